@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import asyncio
 import re
 import discord
@@ -18,16 +19,24 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-from utils.conversation.context import user_personas, user_conversations
+from utils.conversation.context import user_personas, user_conversations, MODELS
+from utils.conversation.history import Conversation, Message
 from utils.ai.multimodal import build_multimodal_content, clean_conversation_history, has_non_image_attachments
 from utils.core.datetime_utils import prepend_date_context
 from utils.core.text_formatting import fix_social_media_links, contains_social_media_links, contains_user_mentions, remove_mentions_from_text
 from utils.ai.message_processing import (
-    get_system_prompt, check_spotify_keywords, find_foreign_conversation,
+    get_system_prompt, get_persona_notes, check_spotify_keywords, find_foreign_conversation,
     build_user_message_content, get_function_schemas, handle_openai_response,
     send_response, update_conversation_history
 )
+from utils.ai.responses_api import RESPONSES_MODE, handle_responses_turn, invalidate_response_chain
 from utils.interactions.actions import handle_pending_action, PING_ACTIONS_INSTRUCTION
+from utils.ai.tool_gating import select_tools, PING_USER
+from utils.ai.model_router import AUTO_MODEL_ID, route_model, log_routing_decision
+from utils.interactions.inflight import (
+    run_cancellable, cancel_for_message, inflight_content, inflight_kind, release_message, CANCELLED,
+)
+from utils.interactions.rate_limits import estimate_turn_tokens, acquire, settle, notify_rejected, OUTPUT_ALLOWANCE
 
 # Main bot entry point and event handlers
 
@@ -41,6 +50,13 @@ intents.reactions = True  # needed for the ✅ confirmation gate on interactive
 # Main bot class
 class MyBot(commands.Bot):
     async def setup_hook(self):
+        # Load the tokenizer off-loop before the first message needs it
+        from utils.core.tokens import preload_encoders
+        await preload_encoders()
+        # Keep the exchange-rate table warm in the background
+        from utils.integrations.currency import run_rates_refresher
+        # (keep a reference: the loop only holds tasks weakly)
+        self.rates_refresher = asyncio.create_task(run_rates_refresher())
         # Setup cogs and sync commands
         try:
             from cogs.spotify import Spotify
@@ -105,6 +121,10 @@ async def on_ready():
         import traceback
         traceback.print_exc()
 
+def is_tldr_mention(message: discord.Message):
+    return bot.user in message.mentions and re.search(r'/tldr', message.content or '', re.IGNORECASE)
+
+
 @bot.event
 async def on_message(message: discord.Message):
     # Handles incoming messages
@@ -115,10 +135,11 @@ async def on_message(message: discord.Message):
 
     # TLDR mention shortcut — run BEFORE the link fixer, but don't return yet so the
     # fixer can still clean up the raw social media URL in the same message
-    is_tldr = bot.user in message.mentions and re.search(r'/tldr', message.content or '', re.IGNORECASE)
+    is_tldr = is_tldr_mention(message)
     if is_tldr:
         from cogs.transcribe import handle_tldr_mention
-        await handle_tldr_mention(message)
+        if await run_cancellable(message, handle_tldr_mention(message), kind="tldr") is CANCELLED:
+            return  # edited/deleted mid-job — the edit handler restarts it, nothing to fix up
         # fall through to link fixer below
 
     # Check for social media links that need fixing FIRST (before any channel restrictions)
@@ -222,6 +243,13 @@ async def on_message(message: discord.Message):
         if str(message.channel.id) in allowed_channels and message.content.startswith("!"):
             return
 
+    # Run the LLM pipeline as a task tracked by this message's id, so deleting or
+    # editing the message cancels it (see on_raw_message_delete / on_raw_message_edit)
+    await run_cancellable(message, respond_to_message(message))
+
+
+async def respond_to_message(message: discord.Message):
+    # Generates and sends the AI reply for a message that passed the channel checks
     channel_id = message.channel.id
     user_id = message.author.id
     conv_key = (user_id, channel_id)
@@ -233,46 +261,69 @@ async def on_message(message: discord.Message):
 
     active_conv_key = foreign_conv_key if use_foreign_convo else conv_key
 
-    # Inject TLDR video context when user replies to a TLDR embed
+    # Inject TLDR video context when user replies to a TLDR embed. Long transcripts are
+    # retrieved from, not cut: the first reply stores the passages relevant to its
+    # question, and each later reply gets its own relevant excerpts for that turn only.
+    tldr_excerpts = []
     if message.reference and message.reference.message_id:
         try:
             from cogs.transcribe import tldr_results
+            from utils.integrations.video import TranscriptIndex
             ref_id = message.reference.message_id
             if ref_id in tldr_results:
                 result = tldr_results[ref_id]
+                index = result.get("index")
+                if index is None:
+                    index = result["index"] = TranscriptIndex(result["transcript"])
                 marker = f"[TLDR:{ref_id}]"
-                conv = user_conversations.get(active_conv_key, [])
-                if not any(marker in (m.get("content") or "") for m in conv):
+                conv = user_conversations.setdefault(active_conv_key, Conversation())
+                if not any(isinstance(m.content, str) and marker in m.content for m in conv):
                     title = result["metadata"].get("title", "Unknown")
                     ctx_block = (
                         f"{marker}\nThe user is asking about a video they TLDRed.\n"
-                        f"Title: \"{title}\"\nTranscript:\n{result['transcript'][:8000]}"
+                        f"Title: \"{title}\"\nTranscript:\n{index.context(message.content or '')}"
                     )
-                    insert_at = 1 if len(conv) > 0 else 0
-                    conv.insert(insert_at, {"role": "system", "content": ctx_block})
-                    conv.insert(insert_at + 1, {"role": "assistant", "content": result["summary"]})
-                    user_conversations[active_conv_key] = conv
+                    conv.insert(0, Message("system", ctx_block))
+                    conv.insert(1, Message("assistant", result["summary"]))
+                    invalidate_response_chain(active_conv_key)  # replay so the model sees the injected context
+                elif index.truncated:
+                    excerpts = index.context(message.content or "", budget=4000, include_opening=False)
+                    tldr_excerpts.append({
+                        "role": "system",
+                        "content": f"{marker} Transcript excerpts relevant to this question:\n{excerpts}",
+                    })
         except Exception:
             pass  # never let this block the normal message pipeline
 
     persona = user_personas.get(active_conv_key, "Default")
     
-    # Get system prompt and model
+    # Get system prompt and model. The current exchange (this message plus the bot's
+    # last reply) drives which persona-file passages are retrieved for this turn; they
+    # go in their own message before the user turn so the system prompt stays static.
+    conversation = user_conversations.get(active_conv_key)
+    if conversation is None:
+        conversation = Conversation()
+    last_assistant = conversation.last_assistant()
+    last_reply = last_assistant.text() if last_assistant else ""
     system_prompt, model = await get_system_prompt(persona, active_conv_key)
+    persona_notes = get_persona_notes(persona, f"{message.content or ''}\n{last_reply}")
     
     # Add Spotify instruction if needed
     spotify_instruction = ""
     if check_spotify_keywords(message.content or ""):
         spotify_instruction = "\n\nNOTE: Only add Spotify links if you are specifically recommending music that the user has explicitly requested. Do NOT add Spotify links to general conversations."
 
-    current_system_prompt = prepend_date_context(system_prompt + spotify_instruction + PING_ACTIONS_INSTRUCTION)
+    # Decide locally which tools this message could need; only those schemas (and the
+    # ping instruction, when ping_user is in play) are sent with the completion. Tools
+    # offered last turn stay available for this one, so follow-ups keep them.
+    mentions_other_user = any(u.id != bot.user.id for u in message.mentions)
+    tool_names = select_tools(message.content or "", mentions_other_user, active_conv_key)
+    ping_instruction = PING_ACTIONS_INSTRUCTION if PING_USER in tool_names else ""
 
-    # Initialize or update conversation
-    conversation = user_conversations.get(active_conv_key, [])
-    if not conversation or conversation[0]["role"] != "system":
-        conversation = [{"role": "system", "content": current_system_prompt}]
-    else:
-        conversation[0]["content"] = current_system_prompt
+    current_system_prompt = prepend_date_context(system_prompt + spotify_instruction + ping_instruction)
+
+    # The system prompt is rebuilt per turn and only referenced by the conversation
+    conversation.system_prompt = current_system_prompt
 
     # Build multimodal content from message
     content = await build_multimodal_content(message)
@@ -289,7 +340,7 @@ async def on_message(message: discord.Message):
     client = AsyncOpenAI(
         api_key=openai_api_key,
         timeout=60.0,
-        max_retries=2
+        max_retries=0  # retries, breakers and fallback live in utils/ai/resilience.py
     )
 
     # Build user message for OpenAI
@@ -297,29 +348,63 @@ async def on_message(message: discord.Message):
         message, content, original_user_id, original_display_name
     )
 
-    # Clean conversation history
-    conversation = await clean_conversation_history(conversation)
-    api_ready_conversation = []
-    for msg in conversation:
-        api_msg = {"role": msg["role"], "content": msg["content"]}
-        api_ready_conversation.append(api_msg)
-        
-    messages = api_ready_conversation + [{"role": "user", "content": api_message_content}]
+    # Drop expired images in place, then take the incrementally maintained API view
+    await clean_conversation_history(conversation)
+    messages = conversation.api_messages(*tldr_excerpts, *persona_notes, {"role": "user", "content": api_message_content})
 
-    # Call OpenAI and send response
-    async with message.channel.typing():
-        function_schemas = get_function_schemas()
-        choice, answer, pending_action = await handle_openai_response(client, messages, function_schemas, model, openai_api_key)
+    # Admission control: charge this turn's estimated tokens to the user, channel and
+    # guild buckets (may wait briefly for a refill, or reject with a canned reply)
+    estimated_tokens = estimate_turn_tokens(messages)
+    charged_buckets = await acquire(message, estimated_tokens)
+    if charged_buckets is None:
+        await notify_rejected(message)
+        return
 
-        if choice is None:
-            await message.reply(answer)
-            return
+    # "Auto" model: pick a concrete model for this turn from cheap local signals
+    route = None
+    if model == AUTO_MODEL_ID:
+        parts = content if isinstance(content, list) else []
+        has_images = any(isinstance(part, dict) and part.get("type") == "image_url" for part in parts)
+        # Includes replied-to text and extracted file contents, not just the typed message
+        route_text = " ".join(part.get("text", "") for part in parts if isinstance(part, dict)) or (message.content or "")
+        route = route_model(route_text, has_images, has_files, tool_names)
+        model = MODELS[route[0]]["id"]
+    started = time.monotonic()
+
+    # Call OpenAI and send response
+    # A turn that raises or is cancelled (message edited/deleted) hands its charge back
+    settled = False
+    try:
+        async with message.channel.typing():
+            function_schemas = get_function_schemas(tool_names)
+            if RESPONSES_MODE:
+                # Server-side state: only the new turn is sent when a live chain exists
+                choice, answer, pending_action = await handle_responses_turn(
+                    client, active_conv_key, messages, function_schemas, model, openai_api_key
+                )
+            else:
+                choice, answer, pending_action = await handle_openai_response(client, messages, function_schemas, model, openai_api_key)
+
+            if route:
+                log_routing_decision(route[0], route[1], time.monotonic() - started, messages, answer)
+
+            if choice is None:
+                settle(charged_buckets, estimated_tokens, 0)  # nothing was produced; refund
+                settled = True
+                await message.reply(answer)
+                return
+            settle(charged_buckets, estimated_tokens, estimated_tokens - OUTPUT_ALLOWANCE + len(answer or "") // 4)
+            settled = True
+    finally:
+        if not settled:
+            settle(charged_buckets, estimated_tokens, 0)
 
     # Capture the sent ack so an interactive action can react to it. Confirmation/
     # execution runs OUTSIDE the typing() block so the reaction wait doesn't hang it.
     # For ping/schedule acks, suppress mentions so the target isn't pinged (spoiled)
     # by the acknowledgement — only the actual action should ping them.
     ack_message = await send_response(message, answer, suppress_mentions=bool(pending_action))
+    release_message(message.id)  # the reply is out; edits/deletes no longer cancel this turn
 
     if pending_action:
         await handle_pending_action(bot, message, ack_message, pending_action)
@@ -329,6 +414,39 @@ async def on_message(message: discord.Message):
         conversation, clean_message_content, answer, user_id, display_name, username, active_conv_key, openai_api_key
     )
 
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    # Nobody will read an answer to a deleted message — stop generating it
+    cancel_for_message(payload.message_id, "message deleted")
+
+
+@bot.event
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent):
+    # Restart in-flight work with the edited content. Embed unfurls also arrive as
+    # edits, so only a real content change counts.
+    new_content = payload.data.get("content")
+    old_content = inflight_content(payload.message_id)
+    if new_content is None or old_content is None or new_content == old_content:
+        return
+    kind = inflight_kind(payload.message_id)
+    if not cancel_for_message(payload.message_id, "message edited"):
+        return
+    try:
+        channel = bot.get_channel(payload.channel_id) or await bot.fetch_channel(payload.channel_id)
+        edited = await channel.fetch_message(payload.message_id)
+    except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+        return
+    # Restart only the pipeline that was cancelled. Re-entering on_message would run
+    # the link fixer (repost) and admission checks a second time for the same message.
+    if kind == "tldr":
+        if not is_tldr_mention(edited):
+            return  # the /tldr request was edited away
+        from cogs.transcribe import handle_tldr_mention
+        await run_cancellable(edited, handle_tldr_mention(edited), kind="tldr")
+    else:
+        await run_cancellable(edited, respond_to_message(edited))
+
+
 # Run the bot
 if __name__ == "__main__":
     bot.run(os.getenv('DISCORD_TOKEN'))
\ No newline at end of file
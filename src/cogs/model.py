@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.conversation.context import user_models, user_conversations, GLOBAL_BEHAVIOR, MODELS
+from utils.conversation.context import user_models, user_conversations, response_chains, GLOBAL_BEHAVIOR, MODELS
 from utils.conversation.persona_loaders import load_jagbir_persona, load_lemon_persona, load_epoe_persona
 
 class Model(commands.GroupCog, name="model"):
@@ -88,6 +88,7 @@ class Model(commands.GroupCog, name="model"):
     async def reset(self, interaction: discord.Interaction):
         # Reset the user's conversation history
         key = (interaction.user.id, interaction.channel_id)
+        response_chains.pop(key, None)  # server-side Responses history goes too
         
         if key in user_conversations:
             del user_conversations[key]
@@ -1,8 +1,8 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.conversation.context import user_personas, user_conversations, GLOBAL_BEHAVIOR, PERSONAS
-from utils.conversation.persona_loaders import load_jagbir_persona, load_lemon_persona, load_epoe_persona
+from utils.conversation.context import user_personas, user_conversations, response_chains, PERSONAS
+from utils.conversation.history import Conversation
 
 class Persona(commands.GroupCog, name="persona"):
     # Handles persona switching commands
@@ -33,14 +33,9 @@ class Persona(commands.GroupCog, name="persona"):
             if key_name.lower() == persona.lower():
                 key = (interaction.user.id, interaction.channel_id)
                 user_personas[key] = key_name
-                if key_name == "Jagbir":
-                    user_conversations[key] = [{"role": "system", "content": GLOBAL_BEHAVIOR + " " + load_jagbir_persona()}]
-                elif key_name == "Lemon":
-                    user_conversations[key] = [{"role": "system", "content": GLOBAL_BEHAVIOR + " " + load_lemon_persona()}]
-                elif key_name == "Epoe":
-                    user_conversations[key] = [{"role": "system", "content": GLOBAL_BEHAVIOR + " " + load_epoe_persona()}]
-                else:
-                    user_conversations[key] = [{"role": "system", "content": GLOBAL_BEHAVIOR}]
+                response_chains.pop(key, None)  # history restarts with the new persona
+                # Fresh history; the persona's system prompt is built per turn in on_message
+                user_conversations[key] = Conversation()
                 await interaction.response.send_message(f"Persona changed to **{key_name}**.")
                 return
 
@@ -1,5 +1,6 @@
 import io
 import os
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -8,9 +9,12 @@ from openai import AsyncOpenAI
 
 from utils.integrations.video import (
     download_audio, download_video, download_instagram_video, download_attachment,
-    transcribe_audio, summarize_transcript,
+    transcribe_audio_segments, summarize_transcript,
     extract_frames, extract_url_from_text, normalize_url, extract_audio_track,
+    fetch_youtube_transcript, resolve_media_stream,
 )
+from utils.integrations.audio import segments_to_text, format_timestamped, transcribe_speech
+from utils.integrations import tldr_cache, tldr_jobs, media_stream
 
 # Platforms where we download full video and extract frames for visual context
 _SHORT_FORM_PLATFORMS = {"TikTok", "Instagram", "Twitter/X"}
@@ -61,6 +65,12 @@ def _fmt_duration(seconds) -> str:
     return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
 
 
+async def _transcribe(path: str, openai_client: AsyncOpenAI) -> tuple[str, str]:
+    # (plain transcript, transcript with [m:ss] markers on the original timeline)
+    segments = await transcribe_audio_segments(path, openai_client)
+    return segments_to_text(segments), format_timestamped(segments)
+
+
 def _build_tldr_embed(
     summary: str,
     metadata: dict,
@@ -69,12 +79,14 @@ def _build_tldr_embed(
     transcript: str,
     include_transcript: bool,
     used_vision: bool,
+    transcript_source: str = "Whisper",
+    timed_transcript: str | None = None,
 ) -> tuple[discord.Embed, list[discord.File]]:
     title       = (metadata.get("title") or "Video Summary")[:200]
     dur_str     = _fmt_duration(metadata.get("duration", 0))
     icon        = "📋" if mode == "brief" else "📄"
     mode_label  = "Brief" if mode == "brief" else "Detailed"
-    src_label   = "Whisper + Vision" if used_vision else "Whisper"
+    src_label   = f"{transcript_source} + Vision" if used_vision else transcript_source
 
     emb = discord.Embed(
         title=f"{icon} {title}",
@@ -89,7 +101,8 @@ def _build_tldr_embed(
     files = []
     if include_transcript:
         if len(transcript) > 800:
-            txt_bytes = io.BytesIO(transcript.encode("utf-8"))
+            # The attached file carries [m:ss] markers when Whisper gave us segments
+            txt_bytes = io.BytesIO((timed_transcript or transcript).encode("utf-8"))
             files.append(discord.File(
                 txt_bytes,
                 filename=f"transcript_{platform.lower().replace('/', '-')}.txt",
@@ -125,96 +138,233 @@ async def _run_tldr(
     Returns (embed, files, transcript, metadata, summary).
     Raises ValueError for user-facing errors, Exception for unexpected failures.
     """
-    platform   = _detect_platform(url)
-    media_path = None
-    frames: list[str] = []
-    used_vision = False
+    platform = _detect_platform(url)
+    key = await asyncio.get_event_loop().run_in_executor(None, tldr_cache.media_key_for_url, url)
+    keys = [key]
+    media = await tldr_cache.get_media(key)
+    if media is None:
+        async def fetch(step):
+            media = await _fetch_url_media(url, platform, openai_client, step)
+            tldr_cache.put_media([key, media["metadata"].get("media_key")], media)
+            return media
+
+        # Concurrent TLDRs of the same video share one download + transcription
+        media = await tldr_jobs.run_shared(key, fetch, on_step)
+        keys.append(media["metadata"].get("media_key"))
+    return await _summarize_media(media, keys, mode, platform, include_transcript, openai_client, on_step)
+
+
+async def _summarize_media(
+    media: dict,
+    keys: list[str],
+    mode: str,
+    platform: str,
+    include_transcript: bool,
+    openai_client: AsyncOpenAI,
+    on_step,
+) -> tuple[discord.Embed, list[discord.File], str, dict, str]:
+    # Summary for `mode` (cached per media key), then the embed
+    transcript, metadata, frames = media["transcript"], media["metadata"], media["frames"]
+    summary = await tldr_cache.get_summary(keys[0], mode)
+    if summary is None:
+        async def summarize(step):
+            await step("Generating summary...")
+            summary = await summarize_transcript(
+                transcript, metadata, mode, openai_client,
+                frames=frames or None,
+            )
+            tldr_cache.put_summary(keys, mode, summary)
+            return summary
+
+        summary = await tldr_jobs.run_shared(f"summary:{mode}:{keys[0]}", summarize, on_step)
+
+    emb, files = _build_tldr_embed(
+        summary, metadata, mode, platform,
+        transcript, include_transcript, bool(frames), media["transcript_source"],
+        media["timed_transcript"],
+    )
+    return emb, files, transcript, metadata, summary
 
+
+async def _transcribe_pcm(pcm, openai_client: AsyncOpenAI, source_bytes: int) -> tuple[str, str]:
+    # _transcribe for audio that was already decoded in memory (streaming mode)
+    segments = await transcribe_speech(pcm, openai_client, source_bytes=source_bytes)
+    return segments_to_text(segments), format_timestamped(segments)
+
+
+async def _stream_url_media(url: str, platform: str, openai_client: AsyncOpenAI, on_step) -> dict | None:
+    """
+    Streaming mode for a link (see utils/integrations/media_stream.py): the probed
+    media URL is demuxed in one pass, no temp files. Returns the media dict, or None
+    to take the temp-file path instead.
+    """
+    short_form = platform in _SHORT_FORM_PLATFORMS
+    await on_step(f"Streaming {platform} {'video' if short_form else 'audio'}...")
     try:
-        if platform == "YouTube":
-            raise ValueError("YouTube isn't supported — try TikTok, Instagram, Twitter/X, or Reddit instead.")
+        resolved = await resolve_media_stream(url, "video" if short_form else "audio")
+        if resolved is None:
+            print("[tldr] only fragmented formats available, using temp files")
+            return None
+        stream_url, headers, metadata, max_bytes = resolved
+        streamed = await media_stream.stream_media(
+            stream_url, headers, metadata.get("duration"),
+            frames_max_duration=_SHORT_FORM_MAX_DURATION if short_form else None,
+            max_bytes=max_bytes,
+        )
+    except (ValueError, media_stream.StreamUnavailable) as e:
+        # The temp-file path has its own fallbacks (audio-only, carousels) and errors
+        print(f"[tldr] streaming unavailable ({e}), using temp files")
+        return None
+
+    await on_step("Transcribing...")
+    transcript, timed_transcript = await _transcribe_pcm(streamed.pcm, openai_client, streamed.source_bytes)
+    if not transcript:
+        raise ValueError("No speech detected in this video.")
+    metadata["duration"] = metadata.get("duration") or int(streamed.duration)
+    return {
+        "transcript":        transcript,
+        "timed_transcript":  timed_transcript,
+        "transcript_source": "Whisper",
+        "metadata":          metadata,
+        "frames":            streamed.frames,
+    }
+
+
+async def _sample_frames(path: str, duration: int) -> list[str]:
+    # extract_frames is a blocking OpenCV loop — keep it off the event loop
+    try:
+        return await asyncio.get_event_loop().run_in_executor(None, extract_frames, path, duration)
+    except Exception as e:
+        print(f"[tldr] frame extraction failed ({e}), continuing without vision")
+        return []
 
-        elif platform in _SHORT_FORM_PLATFORMS:
-            await on_step(f"Downloading {platform} video...")
-            transcript = None
-            metadata = {}
 
-            # Try video download first (enables frame extraction for visual context)
+async def _transcribe_short_form(
+    url: str,
+    media_path: str | None,
+    metadata: dict,
+    openai_client: AsyncOpenAI,
+    on_step,
+) -> tuple[str, str | None, dict]:
+    """
+    Transcript for a short-form post: from the downloaded video when there is one,
+    else from its extracted audio track, else from a separate audio download.
+    Returns (transcript, timed transcript, metadata).
+    """
+    transcript = timed_transcript = None
+    if media_path:
+        video_size = os.path.getsize(media_path)
+        # Only send to Whisper if within the 25 MB API limit
+        if video_size <= _WHISPER_SIZE_LIMIT:
+            await on_step("Transcribing...")
             try:
-                if platform == "Instagram":
-                    media_path, metadata = await download_instagram_video(url)
-                else:
-                    media_path, metadata = await download_video(url)
-            except ValueError as dl_err:
-                print(f"[tldr] video download failed ({dl_err}), falling back to audio-only")
-                media_path = None
+                transcript, timed_transcript = await _transcribe(media_path, openai_client)
+            except Exception as whisper_err:
+                print(f"[tldr] video transcription failed ({whisper_err}), falling back to audio-only")
+                transcript = timed_transcript = None
+        else:
+            print(f"[tldr] video file {video_size // (1024 * 1024)} MB exceeds Whisper limit, falling back to audio-only")
 
+    if not transcript:
+        audio_path = None
+        try:
             if media_path:
-                duration = metadata.get("duration", 0) or 0
-                video_size = os.path.getsize(media_path)
-                # Extract frames regardless of file size — they're sent to vision, not Whisper
-                if duration <= _SHORT_FORM_MAX_DURATION:
-                    frames = extract_frames(media_path, duration)
-                    used_vision = bool(frames)
-                # Only send to Whisper if within the 25 MB API limit
-                if video_size <= _WHISPER_SIZE_LIMIT:
-                    await on_step("Transcribing...")
-                    try:
-                        transcript = await transcribe_audio(media_path, openai_client)
-                    except Exception as whisper_err:
-                        print(f"[tldr] video transcription failed ({whisper_err}), falling back to audio-only")
-                        transcript = None
-                else:
-                    print(f"[tldr] video file {video_size // (1024 * 1024)} MB exceeds Whisper limit, falling back to audio-only")
-
-            if not transcript:
-                audio_path = None
+                # Video already on disk — pull the audio track in-process as
+                # 16 kHz mono speech audio: a fraction of a MB per minute.
+                await on_step("Extracting audio track...")
                 try:
-                    if media_path:
-                        # Video already on disk — demux the audio track in-process.
-                        # PyAV copies the AAC stream without re-encoding: ~2 MB from a 27 MB mp4.
-                        await on_step("Extracting audio track...")
-                        try:
-                            audio_path = await extract_audio_track(media_path)
-                        except Exception as extraction_err:
-                            print(f"[tldr] audio extraction failed ({extraction_err}), downloading instead")
-                            audio_path = None
-
-                    if audio_path is None:
-                        step_msg = "Downloading audio..." if not media_path else "Retrying with audio download..."
-                        await on_step(step_msg)
-                        audio_path, audio_meta = await download_audio(url)
-                        if not metadata:
-                            metadata = audio_meta
-
-                    await on_step("Transcribing...")
-                    transcript = await transcribe_audio(audio_path, openai_client)
-                except Exception as e:
-                    raise ValueError(f"Could not transcribe video: {e}") from None
-                finally:
-                    if audio_path and os.path.exists(audio_path):
-                        os.remove(audio_path)
+                    audio_path = await extract_audio_track(media_path)
+                except Exception as extraction_err:
+                    print(f"[tldr] audio extraction failed ({extraction_err}), downloading instead")
+                    audio_path = None
+
+            if audio_path is None:
+                step_msg = "Downloading audio..." if not media_path else "Retrying with audio download..."
+                await on_step(step_msg)
+                audio_path, audio_meta = await download_audio(url)
+                if not metadata:
+                    metadata = audio_meta
 
-        else:
-            await on_step(f"Downloading {platform} audio...")
-            media_path, metadata = await download_audio(url)
             await on_step("Transcribing...")
-            transcript = await transcribe_audio(media_path, openai_client)
+            transcript, timed_transcript = await _transcribe(audio_path, openai_client)
+        except Exception as e:
+            raise ValueError(f"Could not transcribe video: {e}") from None
+        finally:
+            if audio_path and os.path.exists(audio_path):
+                os.remove(audio_path)
+
+    return transcript, timed_transcript, metadata
+
+
+async def _fetch_url_media(url: str, platform: str, openai_client: AsyncOpenAI, on_step) -> dict:
+    """
+    Download + transcribe a link (the mode-independent, cacheable part of a TLDR).
+    Returns {"transcript", "timed_transcript", "transcript_source", "metadata", "frames"}.
+    """
+    media_path = None
+    frames: list[str] = []
+    transcript = None
+    timed_transcript = None
+    transcript_source = "Whisper"
+
+    try:
+        if platform == "YouTube":
+            # Caption fast path: existing (manual or auto) captions skip download + Whisper.
+            # Overlong videos are rejected here too, as the download path would.
+            await on_step("Fetching YouTube captions...")
+            captioned = await fetch_youtube_transcript(url)
+            if captioned:
+                transcript, metadata = captioned
+                transcript_source = "YouTube captions"
+            else:
+                print("[tldr] no YouTube captions, falling back to audio download + Whisper")
 
         if not transcript:
-            raise ValueError("No speech detected in this video.")
+            if media_stream.TLDR_STREAMING:
+                streamed = await _stream_url_media(url, platform, openai_client, on_step)
+                if streamed is not None:
+                    return streamed
 
-        await on_step("Generating summary...")
-        summary = await summarize_transcript(
-            transcript, metadata, mode, openai_client,
-            frames=frames or None,
-        )
+            if platform in _SHORT_FORM_PLATFORMS:
+                await on_step(f"Downloading {platform} video...")
+                transcript = None
+                metadata = {}
 
-        emb, files = _build_tldr_embed(
-            summary, metadata, mode, platform,
-            transcript, include_transcript, used_vision,
-        )
-        return emb, files, transcript, metadata, summary
+                # Try video download first (enables frame extraction for visual context)
+                try:
+                    if platform == "Instagram":
+                        media_path, metadata = await download_instagram_video(url)
+                    else:
+                        media_path, metadata = await download_video(url)
+                except ValueError as dl_err:
+                    print(f"[tldr] video download failed ({dl_err}), falling back to audio-only")
+                    media_path = None
+
+                # Frames are sampled in a worker thread while the audio goes through
+                # Whisper; the summary starts once both are done.
+                duration = metadata.get("duration", 0) or 0
+                sample = media_path and duration <= _SHORT_FORM_MAX_DURATION
+                frames, (transcript, timed_transcript, metadata) = await asyncio.gather(
+                    _sample_frames(media_path, duration) if sample else asyncio.sleep(0, result=[]),
+                    _transcribe_short_form(url, media_path, metadata, openai_client, on_step),
+                )
+
+            else:
+                await on_step(f"Downloading {platform} audio...")
+                media_path, metadata = await download_audio(url)
+                await on_step("Transcribing...")
+                transcript, timed_transcript = await _transcribe(media_path, openai_client)
+
+        if not transcript:
+            raise ValueError("No speech detected in this video.")
+
+        return {
+            "transcript":        transcript,
+            "timed_transcript":  timed_transcript,
+            "transcript_source": transcript_source,
+            "metadata":          metadata,
+            "frames":            frames,
+        }
 
     finally:
         if media_path and os.path.exists(media_path):
@@ -238,82 +388,206 @@ async def _run_tldr_attachment(
     if not (is_video or is_audio):
         raise ValueError("Attachment must be a video or audio file.")
 
-    # Video files get their audio stripped to a tiny track before Whisper, so we can
-    # accept larger uploads. Audio goes to Whisper (after optional transcode) — cap near its limit.
-    max_size = 100 * 1024 * 1024 if is_video else 25 * 1024 * 1024
+    # Video files get their audio stripped to a small track before Whisper, and long
+    # audio is transcribed in chunks, so both accept uploads well past Whisper's 25 MB.
+    max_size = 100 * 1024 * 1024
     if attachment.size > max_size:
         raise ValueError(
             f"File too large — max {max_size // (1024 * 1024)} MB "
             f"(this file is {attachment.size // (1024 * 1024)} MB)."
         )
 
-    ext = attachment.filename.rsplit(".", 1)[-1].lower() if "." in attachment.filename else ""
+    if media_stream.TLDR_STREAMING:
+        result = await _run_tldr_attachment_streamed(
+            attachment, is_video, max_size, mode, include_transcript, openai_client, on_step,
+        )
+        if result is not None:
+            return result
 
     await on_step("Downloading attachment...")
     path = None
-    audio_path = None
+    handed_off = False  # the shared job deletes the file once it has started on it
     try:
         path = await download_attachment(attachment.url, attachment.filename)
+        platform = "Video" if is_video else "Audio"
+        key = await asyncio.get_event_loop().run_in_executor(None, tldr_cache.media_key_for_file, path)
+        media = await tldr_cache.get_media(key)
+        if media is None:
+            async def process(step):
+                nonlocal handed_off
+                handed_off = True
+                media = await _process_attachment_file(path, attachment, is_video, openai_client, step)
+                tldr_cache.put_media([key], media)
+                return media
+
+            # The same file uploaded again while this one is still processing shares the job
+            media = await tldr_jobs.run_shared(key, process, on_step)
+
+        # Cached/shared media may come from another upload of the same bytes
+        metadata = {**media["metadata"], "title": attachment.filename, "webpage_url": attachment.url}
+        return await _summarize_media(
+            {**media, "metadata": metadata}, [key], mode, platform,
+            include_transcript, openai_client, on_step,
+        )
+
+    finally:
+        if path and not handed_off and os.path.exists(path):
+            os.remove(path)
+
+
+async def _run_tldr_attachment_streamed(
+    attachment: discord.Attachment,
+    is_video: bool,
+    max_size: int,
+    mode: str,
+    include_transcript: bool,
+    openai_client: AsyncOpenAI,
+    on_step,
+) -> tuple[discord.Embed, list[discord.File], str, dict, str] | None:
+    """
+    Streaming mode for an upload: one demux pass over the CDN response, hashed on the
+    way through for the cache key. None when the file can't be streamed (e.g. an MP4
+    with its index at the end) — the caller then downloads it to a temp file.
+    """
+    platform = "Video" if is_video else "Audio"
+
+    async def stream(step):
+        # (key, media) or None. The content hash only exists once the bytes have been
+        # read, so requesters of the same upload share this job by attachment id; the
+        # transcription is then shared by hash with other uploads of the same bytes.
+        await step("Streaming attachment...")
+        try:
+            streamed = await media_stream.stream_media(
+                attachment.url,
+                frames_max_duration=_SHORT_FORM_MAX_DURATION if is_video else None,
+                max_bytes=max_size,
+            )
+        except media_stream.StreamUnavailable as e:
+            print(f"[tldr attachment] streaming unavailable ({e}), downloading instead")
+            return None
+
+        key = tldr_cache.media_key_for_digest(streamed.sha256)
+        media = await tldr_cache.get_media(key)
+        if media is None:
+            async def process(step):
+                await step("Transcribing...")
+                transcript, timed_transcript = await _transcribe_pcm(streamed.pcm, openai_client, streamed.source_bytes)
+                if not transcript:
+                    raise ValueError("No speech detected in this file.")
+                media = {
+                    "transcript":        transcript,
+                    "timed_transcript":  timed_transcript,
+                    "transcript_source": "Whisper",
+                    "metadata": {
+                        "title": attachment.filename,
+                        "duration": int(streamed.duration),
+                        "thumbnail": None,
+                        "uploader": "",
+                        "webpage_url": attachment.url,
+                    },
+                    "frames":            streamed.frames,
+                }
+                tldr_cache.put_media([key], media)
+                return media
+
+            media = await tldr_jobs.run_shared(key, process, step)
+        return key, media
+
+    result = await tldr_jobs.run_shared(f"stream:attachment:{attachment.id}", stream, on_step)
+    if result is None:
+        return None
+    key, media = result
+
+    metadata = {**media["metadata"], "title": attachment.filename, "webpage_url": attachment.url}
+    return await _summarize_media(
+        {**media, "metadata": metadata}, [key], mode, platform,
+        include_transcript, openai_client, on_step,
+    )
+
+
+def _probe_and_sample_sync(path: str) -> tuple[int | None, list[str]]:
+    try:
+        import cv2
+    except ImportError:
+        return None, []
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    total = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    duration = int(total / fps) if fps else 0
+    frames = extract_frames(path, duration) if duration <= _SHORT_FORM_MAX_DURATION else []
+    return duration, frames
+
+
+async def _probe_and_sample(path: str) -> tuple[int | None, list[str]]:
+    # (duration, frames) for an uploaded video, off the event loop
+    try:
+        return await asyncio.get_event_loop().run_in_executor(None, _probe_and_sample_sync, path)
+    except Exception as e:
+        print(f"[tldr attachment] frame extraction failed ({e}), continuing without vision")
+        return None, []
+
+
+async def _process_attachment_file(
+    path: str,
+    attachment: discord.Attachment,
+    is_video: bool,
+    openai_client: AsyncOpenAI,
+    on_step,
+) -> dict:
+    """Frames + transcript for a downloaded attachment. Deletes `path` when done."""
+    filename = attachment.filename
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    audio_path = None
+    try:
         metadata: dict = {
-            "title": attachment.filename,
+            "title": filename,
             "duration": None,
             "thumbnail": None,
             "uploader": "",
             "webpage_url": attachment.url,
         }
 
-        frames: list[str] = []
-        if is_video:
-            try:
-                import cv2
-                cap = cv2.VideoCapture(path)
-                fps = cap.get(cv2.CAP_PROP_FPS) or 25
-                total = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                cap.release()
-                duration = int(total / fps) if fps else 0
-                metadata["duration"] = duration
-                if duration <= _SHORT_FORM_MAX_DURATION:
-                    frames = extract_frames(path, duration)
-            except ImportError:
-                pass
-
         # Convert to a Whisper-supported format when needed. Video is always stripped to
         # its audio track (handles .mov/.mkv/.avi and shrinks the upload); audio is only
         # transcoded when its container isn't one Whisper accepts.
-        transcribe_target = path
-        if is_video or (is_audio and ext not in _WHISPER_SUPPORTED_EXTS):
-            await on_step("Extracting audio track...")
-            try:
-                audio_path = await extract_audio_track(path)
-                transcribe_target = audio_path
-            except Exception as extraction_err:
-                print(f"[tldr attachment] audio extraction failed ({extraction_err})")
-                if ext not in _WHISPER_SUPPORTED_EXTS:
-                    raise ValueError(
-                        f"Couldn't process this .{ext or 'file'} — its audio track could not be extracted."
-                    ) from None
-                transcribe_target = path  # supported container: send it as-is
-
-        await on_step("Transcribing...")
-        transcript = await transcribe_audio(transcribe_target, openai_client)
-        if not transcript:
-            raise ValueError("No speech detected in this file.")
+        async def transcribe_stage():
+            nonlocal audio_path
+            transcribe_target = path
+            if is_video or ext not in _WHISPER_SUPPORTED_EXTS:
+                await on_step("Extracting audio track...")
+                try:
+                    audio_path = await extract_audio_track(path)
+                    transcribe_target = audio_path
+                except Exception as extraction_err:
+                    print(f"[tldr attachment] audio extraction failed ({extraction_err})")
+                    if ext not in _WHISPER_SUPPORTED_EXTS:
+                        raise ValueError(
+                            f"Couldn't process this .{ext or 'file'} — its audio track could not be extracted."
+                        ) from None
+                    transcribe_target = path  # supported container: send it as-is
+            await on_step("Transcribing...")
+            return await _transcribe(transcribe_target, openai_client)
 
-        await on_step("Generating summary...")
-        summary = await summarize_transcript(
-            transcript, metadata, mode, openai_client,
-            frames=frames or None,
+        # Video frames are sampled in a worker thread while the audio is transcribed
+        (duration, frames), (transcript, timed_transcript) = await asyncio.gather(
+            _probe_and_sample(path) if is_video else asyncio.sleep(0, result=(None, [])),
+            transcribe_stage(),
         )
+        metadata["duration"] = duration
+        if not transcript:
+            raise ValueError("No speech detected in this file.")
 
-        platform = "Video" if is_video else "Audio"
-        emb, files = _build_tldr_embed(
-            summary, metadata, mode, platform,
-            transcript, include_transcript, bool(frames),
-        )
-        return emb, files, transcript, metadata, summary
+        return {
+            "transcript":        transcript,
+            "timed_transcript":  timed_transcript,
+            "transcript_source": "Whisper",
+            "metadata":          metadata,
+            "frames":            frames,
+        }
 
     finally:
-        if path and os.path.exists(path):
+        if os.path.exists(path):
             os.remove(path)
         if audio_path and os.path.exists(audio_path):
             os.remove(audio_path)
@@ -325,7 +599,7 @@ class Transcribe(commands.Cog):
 
     @app_commands.command(
         name="tldr",
-        description="Transcribe and summarize a video from TikTok, Twitter/X, Instagram, Reddit, or an uploaded file.",
+        description="Transcribe and summarize a video from YouTube, TikTok, Twitter/X, Instagram, Reddit, or a file.",
     )
     @app_commands.describe(
         url="Link to the video — leave blank to use the most recent video link in this channel",
@@ -386,6 +660,14 @@ async def setup(bot):
 
 # ── Mention handler (imported by bot.py and called from on_message) ────────────
 
+async def _mark_cancelled(progress: discord.Message) -> None:
+    """The triggering message was edited/deleted mid-job (see utils/interactions/inflight.py)."""
+    try:
+        await progress.edit(content="Cancelled — the original message was edited or deleted.")
+    except discord.HTTPException:
+        pass
+
+
 async def handle_tldr_mention(message: discord.Message) -> None:
     """
     Handles `@abgluvr /tldr [-detailed] [-transcript]` in any of these forms:
@@ -415,6 +697,9 @@ async def handle_tldr_mention(message: discord.Message) -> None:
             await progress.delete()
             sent = await message.channel.send(embed=emb, files=files)
             _store_tldr_result(sent.id, transcript, metadata, summary)
+        except asyncio.CancelledError:
+            await _mark_cancelled(progress)
+            raise
         except ValueError as e:
             await progress.edit(content=f"Error: {e}")
         except Exception as e:
@@ -432,6 +717,9 @@ async def handle_tldr_mention(message: discord.Message) -> None:
             await progress.delete()
             sent = await message.channel.send(embed=emb, files=files)
             _store_tldr_result(sent.id, transcript, metadata, summary)
+        except asyncio.CancelledError:
+            await _mark_cancelled(progress)
+            raise
         except ValueError as e:
             await progress.edit(content=f"Error: {e}")
         except Exception as e:
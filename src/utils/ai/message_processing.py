@@ -3,16 +3,18 @@ import os
 import re
 import asyncio
 import discord
-import datetime
 import json
 from openai import AsyncOpenAI
-from utils.conversation.context import user_personas, user_conversations, user_models, GLOBAL_BEHAVIOR, PERSONAS, MODELS, trim_conversation_by_tokens
+from utils.conversation.context import user_personas, user_conversations, user_models, response_chains, GLOBAL_BEHAVIOR, PERSONAS, MODELS, trim_conversation_by_tokens
 from utils.ai.multimodal import build_multimodal_content, clean_conversation_history
 from utils.core.datetime_utils import prepend_date_context
 from utils.integrations.websearch import web_search_and_summarize
 from utils.integrations.currency import convert_currency
 from utils.core.text_formatting import format_discord_links
 from utils.conversation.persona_loaders import load_jagbir_persona, load_lemon_persona, load_epoe_persona
+from utils.conversation.persona_index import build_persona_prompt, build_persona_notes
+from utils.conversation.history import Message, Speaker
+from utils.ai.resilience import call_with_fallback, ModelUnavailable
 from utils.interactions.actions import (
     get_interaction_function_schemas, build_pending_action, build_ack_instruction,
     build_delivery_instruction
@@ -51,14 +53,24 @@ def resolve_discord_user_id(user_str, guild):
     return None
 
 
+PERSONA_FILE_LOADERS = {
+    "Jagbir": load_jagbir_persona,
+    "Lemon": load_lemon_persona,
+    "Epoe": load_epoe_persona,
+}
+
+
 async def get_system_prompt(persona, active_conv_key):
-    # Get the system prompt for the given persona and user's selected model
-    if persona == "Jagbir":
-        system_prompt = GLOBAL_BEHAVIOR + " " + load_jagbir_persona()
-    elif persona == "Lemon":
-        system_prompt = GLOBAL_BEHAVIOR + " " + load_lemon_persona()
-    elif persona == "Epoe":
-        system_prompt = GLOBAL_BEHAVIOR + " " + load_epoe_persona()
+    # Get the system prompt for the given persona and user's selected model.
+    # It is the same every turn; retrieved passages come from get_persona_notes.
+    loader = PERSONA_FILE_LOADERS.get(persona)
+    if loader:
+        try:
+            persona_text = build_persona_prompt(persona, loader)
+        except Exception as e:
+            print(f"[persona] retrieval failed for {persona}, sending full file: {e}")
+            persona_text = loader()
+        system_prompt = GLOBAL_BEHAVIOR + " " + persona_text
     else:
         system_prompt = GLOBAL_BEHAVIOR + " " + PERSONAS[persona]
     
@@ -69,6 +81,20 @@ async def get_system_prompt(persona, active_conv_key):
     return system_prompt, model_id
 
 
+def get_persona_notes(persona, query_text):
+    # Per-turn persona-file passages relevant to query_text (the current exchange), as
+    # system messages to send right before the user turn. Empty for built-in personas.
+    loader = PERSONA_FILE_LOADERS.get(persona)
+    if not loader:
+        return []
+    try:
+        notes = build_persona_notes(persona, loader, query_text)
+    except Exception as e:
+        print(f"[persona] retrieval failed for {persona}: {e}")
+        return []
+    return [{"role": "system", "content": notes}] if notes else []
+
+
 def check_spotify_keywords(message_content):
     # Check if message contains music-related keywords
     explicit_music_keywords = [
@@ -89,42 +115,16 @@ async def find_foreign_conversation(message, bot, channel_id):
         replied = message.reference.resolved
         if replied.author.id == bot.user.id:
             for (other_user_id, ch_id), convo in user_conversations.items():
-                if ch_id == channel_id and convo and len(convo) > 1:
-                    last_assistant_msg = next((msg for msg in reversed(convo) if msg["role"] == "assistant"), None)
-                    if last_assistant_msg:
-                        content_match = False
-                        
-                        if "responding_to" in last_assistant_msg:
-                            if isinstance(last_assistant_msg["content"], str):
-                                content_match = last_assistant_msg["content"].strip() == replied.content.strip()
-                            elif isinstance(last_assistant_msg["content"], list):
-                                text_content = " ".join(
-                                    part.get("text", "") for part in last_assistant_msg["content"] 
-                                    if isinstance(part, dict) and "text" in part
-                                )
-                                content_match = text_content.strip() == replied.content.strip()
-                            
-                            if content_match:
-                                use_foreign_convo = True
-                                foreign_conv_key = (other_user_id, channel_id)
-                                original_user_id = last_assistant_msg["responding_to"].get("user_id")
-                                original_display_name = last_assistant_msg["responding_to"].get("display_name")
-                                break
-                        
-                        elif last_assistant_msg.get("content"):
-                            if isinstance(last_assistant_msg["content"], str):
-                                content_match = last_assistant_msg["content"].strip() == replied.content.strip()
-                            elif isinstance(last_assistant_msg["content"], list):
-                                text_content = " ".join(
-                                    part.get("text", "") for part in last_assistant_msg["content"] 
-                                    if isinstance(part, dict) and "text" in part
-                                )
-                                content_match = text_content.strip() == replied.content.strip()
-                            
-                            if content_match:
-                                use_foreign_convo = True
-                                foreign_conv_key = (other_user_id, channel_id)
-                                break
+                if ch_id == channel_id and len(convo) > 0:
+                    last_assistant_msg = convo.last_assistant()
+                    if last_assistant_msg and last_assistant_msg.content:
+                        if last_assistant_msg.text().strip() == replied.content.strip():
+                            use_foreign_convo = True
+                            foreign_conv_key = (other_user_id, channel_id)
+                            if last_assistant_msg.responding_to:
+                                original_user_id = last_assistant_msg.responding_to.user_id
+                                original_display_name = last_assistant_msg.responding_to.display_name
+                            break
     
     return use_foreign_convo, foreign_conv_key, original_user_id, original_display_name
 
@@ -160,15 +160,16 @@ def build_user_message_content(message, content, original_user_id, original_disp
     return api_message_content, clean_message_content, display_name, username, user_id
 
 
-def get_function_schemas():
-    current_date = datetime.date.today().strftime('%A, %B %d, %Y')
-    # Return function schemas for OpenAI function calling
+def _build_function_schemas():
+    # Build the static function schemas for OpenAI function calling. Built once at
+    # import — the current date reaches the model through the system prompt
+    # (prepend_date_context), not through the tool description.
     return [
         {
             "name": "web_search",
             "description": (
                 f"Searches the web and returns up-to-date information from real sources. "
-                f"Today's date is {current_date}. Your internal knowledge has a training cutoff and may be stale, incomplete, or wrong for anything specific.\n\n"
+                f"Today's date is given in the system prompt. Your internal knowledge has a training cutoff and may be stale, incomplete, or wrong for anything specific.\n\n"
                 f"CALL this whenever giving an accurate answer depends on information you cannot reliably recall from memory, including:\n"
                 f"- Current events, news, recent releases, or anything time-sensitive (prices, scores, weather, schedules, 'latest'/'newest' anything).\n"
                 f"- Specific facts about real people, companies, products, software versions, specs, or events — especially niche or recent ones.\n"
@@ -237,160 +238,279 @@ def get_function_schemas():
     ]
 
 
-async def handle_openai_response(client, messages, function_schemas, model, openai_api_key):
-    # Handle OpenAI API response with robust error handling
-    max_retries = 3
-    
-    for attempt in range(max_retries):
-        try:
-            # Initial API call
-            response = await client.chat.completions.create(
-                model=model,
-                messages=messages,
-                functions=function_schemas,
-                function_call="auto"
-            )
-            choice = response.choices[0]
-            pending_action = None  # discord-side action returned up to on_message
-
-            # Handle function calls if requested
-            if choice.finish_reason == "function_call":
-                func_name = choice.message.function_call.name
-                func_args = choice.message.function_call.arguments
-                args = json.loads(func_args)
-
-                if func_name == "web_search":
-                    try:
-                        web_context = await web_search_and_summarize(args["query"], openai_api_key)
-
-                        # Inject the search results as context while preserving the full
-                        # conversation history, so follow-ups and references stay coherent.
-                        search_context = (
-                            f"[WEB SEARCH RESULTS for the user's latest message]\n"
-                            f"{web_context}\n\n"
-                            f"Use the information above to answer the user's most recent message accurately. "
-                            f"Only use what's relevant; ignore results that don't help. If the results don't actually "
-                            f"answer the question, say so honestly instead of making something up. "
-                            f"Don't announce that you searched — just weave the facts in naturally as if you already knew them, "
-                            f"staying completely in character and consistent with your personality and speaking style. "
-                            f"Respond conversationally, not as a formal report."
-                        )
+_FUNCTION_SCHEMAS = _build_function_schemas()
+_SCHEMAS_BY_NAME = {schema["name"]: schema for schema in _FUNCTION_SCHEMAS}
 
-                        # Preserve the original conversation and append the search context as a
-                        # system message right before generating the final response.
-                        final_messages = messages + [{"role": "system", "content": search_context}]
 
-                        response2 = await client.chat.completions.create(
-                            model=model,
-                            messages=final_messages
-                        )
-                        answer = response2.choices[0].message.content
-                        
-                        # Add source links if available
-                        source_pattern = re.compile(r"Source: (.*?) \((https?://[^)]+)\)")
-                        sources = source_pattern.findall(web_context)
-                        if sources:
-                            sources_section = "\n\nSources:\n" + "\n".join([
-                                f"[{title}]({url})" if title else f"{url}" for title, url in sources
-                            ])
-                            answer = answer.strip() + sources_section
-                            
-                    except Exception as e:
-                        print(f"Error in web search processing: {e}")
-                        answer = "I found some information from web search, but I'm having trouble processing it right now. Please try again."
-                
-                elif func_name == "convert_currency":
-                    try:
-                        result = await convert_currency(
-                            args["amount"], 
-                            args["from_currency"], 
-                            args["to_currency"]
-                        )
-                        
-                        if result.get("success"):
-                            # Format all numbers with commas for better readability
-                            def format_number(num):
-                                if isinstance(num, float):
-                                    # For decimals, format to 2 places and add commas
-                                    return f"{num:,.2f}".rstrip('0').rstrip('.')
-                                else:
-                                    # For integers, just add commas
-                                    return f"{num:,}"
-                            
-                            original_formatted = format_number(result['original_amount'])
-                            converted_formatted = format_number(result['converted_amount'])
-                            rate_formatted = format_number(result['exchange_rate'])
-                            
-                            answer = (
-                                f"{original_formatted} {result['from_currency']} = "
-                                f"**{converted_formatted} {result['to_currency']}**\n\n"
-                                f"-# *Converted via ExchangeRate-API (Rate: 1 {result['from_currency']} = {rate_formatted} {result['to_currency']})*"
-                            )
-                        else:
-                            answer = f"❌ Currency conversion failed: {result.get('error', 'Unknown error')}"
-                    except Exception as e:
-                        print(f"Error in currency conversion: {e}")
-                        answer = "❌ Currency conversion failed due to an unexpected error. Please try again."
-
-                elif func_name == "ping_user":
-                    # This requires Discord context (guild/channel/reactions) that doesn't
-                    # exist here, so we don't execute — we build a normalized pending action
-                    # and return it up to on_message. The ack is generated in the persona's
-                    # voice via a second, function-free completion.
-                    try:
-                        pending_action = build_pending_action(func_name, args)
-
-                        # Only craft a delivery message when the user actually gave something
-                        # to say. With no note it's just a bare ping — don't invent meta-text.
-                        if pending_action.get("note"):
-                            # Craft the ACTUAL message sent to the target in the bot's own
-                            # persona voice (second person). Fed ONLY the persona system prompt
-                            # + the note (NOT the scheduling conversation) so timing/count phrasing
-                            # can't leak into the delivered message. Done now (client available)
-                            # so scheduled sends stay LLM-free.
-                            persona_system = messages[0] if messages and messages[0].get("role") == "system" else None
-                            delivery_messages = ([persona_system] if persona_system else []) + [
-                                {"role": "system", "content": build_delivery_instruction(pending_action)}
-                            ]
-                            delivery_resp = await client.chat.completions.create(
-                                model=model,
-                                messages=delivery_messages
-                            )
-                            crafted = (delivery_resp.choices[0].message.content or "").strip().strip('"').strip()
-                            if crafted:
-                                pending_action["delivery_text"] = crafted
-
-                        # Persona-voiced acknowledgement to the requester (full context is fine here).
-                        instruction = build_ack_instruction(pending_action)
-                        final_messages = messages + [{"role": "system", "content": instruction}]
-                        response2 = await client.chat.completions.create(
-                            model=model,
-                            messages=final_messages
-                        )
-                        answer = response2.choices[0].message.content
-                    except Exception as e:
-                        print(f"Error building interactive action: {e}")
-                        pending_action = None
-                        answer = "hmm, i couldn't set that up right now — try again?"
+def get_function_schemas(tool_names=None):
+    # Return the cached function schemas, optionally only the ones named in tool_names
+    # (see utils.ai.tool_gating.select_tools). Order is kept stable for prompt caching.
+    if tool_names is None:
+        return list(_FUNCTION_SCHEMAS)
+    return [schema for schema in _FUNCTION_SCHEMAS if schema["name"] in tool_names]
+
+
+def build_search_context(web_context):
+    # Inject the search results as context while preserving the full conversation
+    # history, so follow-ups and references stay coherent.
+    return (
+        f"[WEB SEARCH RESULTS for the user's latest message]\n"
+        f"{web_context}\n\n"
+        f"Use the information above to answer the user's most recent message accurately. "
+        f"Only use what's relevant; ignore results that don't help. If the results don't actually "
+        f"answer the question, say so honestly instead of making something up. "
+        f"Don't announce that you searched — just weave the facts in naturally as if you already knew them, "
+        f"staying completely in character and consistent with your personality and speaking style. "
+        f"Respond conversationally, not as a formal report."
+    )
+
+
+def append_sources(answer, web_context):
+    # Add source links from the search context if available
+    source_pattern = re.compile(r"Source: (.*?) \((https?://[^)]+)\)")
+    sources = source_pattern.findall(web_context)
+    if sources:
+        sources_section = "\n\nSources:\n" + "\n".join([
+            f"[{title}]({url})" if title else f"{url}" for title, url in sources
+        ])
+        answer = (answer or "").strip() + sources_section
+    return answer
+
+
+def format_currency_answer(result):
+    # Turn a convert_currency result into the user-facing reply
+    if not result.get("success"):
+        return f"❌ Currency conversion failed: {result.get('error', 'Unknown error')}"
+
+    # Format all numbers with commas for better readability
+    def format_number(num):
+        if isinstance(num, float):
+            # For decimals, format to 2 places and add commas
+            return f"{num:,.2f}".rstrip('0').rstrip('.')
+        else:
+            # For integers, just add commas
+            return f"{num:,}"
+
+    original_formatted = format_number(result['original_amount'])
+    converted_formatted = format_number(result['converted_amount'])
+    rate_formatted = format_number(result['exchange_rate'])
+
+    return (
+        f"{original_formatted} {result['from_currency']} = "
+        f"**{converted_formatted} {result['to_currency']}**\n\n"
+        f"-# *Converted via ExchangeRate-API (Rate: 1 {result['from_currency']} = {rate_formatted} {result['to_currency']})*"
+    )
+
+
+# Optional faster/cheaper model for the ping delivery text (a MODELS label or raw model
+# id). Defaults to the conversation's own model.
+PING_DELIVERY_MODEL = os.getenv("PING_DELIVERY_MODEL")
+
+
+async def craft_delivery_text(client, messages, pending_action, model):
+    # Craft the ACTUAL message sent to the ping target in the bot's own persona voice
+    # (second person). Fed ONLY the persona system prompt + the note (NOT the scheduling
+    # conversation) so timing/count phrasing can't leak into the delivered message.
+    # Returns None when the model produced nothing usable.
+    persona_system = messages[0] if messages and messages[0].get("role") == "system" else None
+    delivery_messages = ([persona_system] if persona_system else []) + [
+        {"role": "system", "content": build_delivery_instruction(pending_action)}
+    ]
+    delivery_model = model
+    if PING_DELIVERY_MODEL:
+        delivery_model = MODELS.get(PING_DELIVERY_MODEL, {}).get("id", PING_DELIVERY_MODEL)
+    delivery_resp, _ = await call_with_fallback(
+        lambda m: client.chat.completions.create(model=m, messages=delivery_messages), delivery_model
+    )
+    crafted = (delivery_resp.choices[0].message.content or "").strip().strip('"').strip()
+    return crafted or None
 
-                else:
-                    answer = f"Function {func_name} not implemented."
 
-            # Handle regular text response
-            else:
-                answer = choice.message.content
+def to_chat_tools(function_schemas):
+    # Wrap the bare function schemas for the chat-completions `tools` parameter
+    return [{"type": "function", "function": schema} for schema in function_schemas or []]
 
-            return choice, answer, pending_action  # Success, return the final answer
 
+async def _execute_tool(func_name, args, client, messages, model, openai_api_key):
+    # Run one tool call. Never raises: failures become an error output for the model.
+    # Returns a dict with:
+    #   output         — what gets fed back to the model as the tool result
+    #   direct_answer  — a finished user-facing reply that needs no follow-up completion
+    #   web_context    — raw search context (for the Sources section)
+    #   pending_action — discord-side action returned up to on_message
+    result = {"output": "", "direct_answer": None, "web_context": None, "pending_action": None}
+
+    if func_name == "web_search":
+        try:
+            web_context = await web_search_and_summarize(args["query"], openai_api_key)
+            result["web_context"] = web_context
+            result["output"] = build_search_context(web_context)
         except Exception as e:
-            print(f"OpenAI API Error (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt + 1 >= max_retries:
-                # All retries failed, return an error message to the user
-                return None, "⚠️ Sorry, I'm having trouble connecting to the AI service after multiple attempts. Please try again later.", None
-            await asyncio.sleep(1.5)  # Wait before retrying
+            print(f"Error in web search processing: {e}")
+            result["output"] = "The web search failed. Say you couldn't look it up right now instead of guessing."
 
-    # Fallback in case the loop finishes unexpectedly
-    return None, "⚠️ An unexpected error occurred while processing your request.", None
+    elif func_name == "convert_currency":
+        try:
+            conversion = await convert_currency(
+                args["amount"],
+                args["from_currency"],
+                args["to_currency"]
+            )
+            result["direct_answer"] = format_currency_answer(conversion)
+        except Exception as e:
+            print(f"Error in currency conversion: {e}")
+            result["direct_answer"] = "❌ Currency conversion failed due to an unexpected error. Please try again."
+        result["output"] = (
+            f"{result['direct_answer']}\n\n"
+            "Include this conversion exactly as written (amounts and rate) in your reply."
+        )
+
+    elif func_name == "ping_user":
+        # This requires Discord context (guild/channel/reactions) that doesn't exist
+        # here, so we don't execute — we build a normalized pending action and return
+        # it up to on_message. The ack is generated in the persona's voice by the
+        # follow-up completion.
+        try:
+            pending_action = build_pending_action(func_name, args)
+
+            # Only craft a delivery message when the user actually gave something
+            # to say. With no note it's just a bare ping — don't invent meta-text.
+            # It doesn't depend on the ack, so it runs as a background task that
+            # overlaps the ack completion (and the ✅ wait); actions.py awaits it
+            # only when the ping is actually sent or persisted.
+            if pending_action.get("note"):
+                pending_action["delivery_task"] = asyncio.create_task(
+                    craft_delivery_text(client, messages, pending_action, model)
+                )
+            result["pending_action"] = pending_action
+            result["output"] = "Ping action prepared."
+        except Exception as e:
+            print(f"Error building interactive action: {e}")
+            result["output"] = "The ping couldn't be set up. Tell the user it failed and to try again."
+
+    else:
+        result["direct_answer"] = f"Function {func_name} not implemented."
+        result["output"] = result["direct_answer"]
+
+    return result
+
+
+async def execute_tool_calls(calls, client, messages, model, openai_api_key):
+    # Run every tool call from one completion concurrently. `calls` is a list of
+    # (call_id, name, arguments_json). Only one ping action can be carried back to
+    # on_message per turn, so any extra ping_user calls are skipped with a note.
+    results = {}
+    jobs = []
+    seen_ping = False
+    for call_id, func_name, func_args in calls:
+        if func_name == "ping_user":
+            if seen_ping:
+                results[call_id] = {
+                    "output": "Skipped: only one ping action can be set up per message.",
+                    "direct_answer": None, "web_context": None, "pending_action": None,
+                }
+                continue
+            seen_ping = True
+        try:
+            args = json.loads(func_args or "{}")
+        except json.JSONDecodeError:
+            args = {}
+        jobs.append((call_id, _execute_tool(func_name, args, client, messages, model, openai_api_key)))
+
+    outputs = await asyncio.gather(*(job for _, job in jobs))
+    for (call_id, _), output in zip(jobs, outputs):
+        results[call_id] = output
+    return [(call_id, results[call_id]) for call_id, _, _ in calls]
+
+
+def discard_pending_actions(tool_results):
+    # Cancel background work from prepared ping actions when the turn is abandoned
+    for _, result in tool_results:
+        pending = result.get("pending_action")
+        if pending and pending.get("delivery_task"):
+            pending["delivery_task"].cancel()
+
+
+def collect_tool_results(tool_results):
+    # Merge per-call results into what the caller needs to finish the turn:
+    # (direct_answer, pending_action, web_context, followup_instructions).
+    # direct_answer is set only when every call was answered locally, in which case
+    # no follow-up completion is needed at all.
+    pending_action = next((r["pending_action"] for _, r in tool_results if r["pending_action"]), None)
+    web_context = "\n\n".join(r["web_context"] for _, r in tool_results if r["web_context"])
+    direct_answer = None
+    if tool_results and all(r["direct_answer"] for _, r in tool_results):
+        direct_answer = "\n\n".join(r["direct_answer"] for _, r in tool_results)
+    followup_instructions = []
+    if pending_action:
+        # Persona-voiced acknowledgement to the requester (full context is fine here).
+        followup_instructions.append(build_ack_instruction(pending_action))
+    return direct_answer, pending_action, web_context, followup_instructions
+
+
+async def handle_openai_response(client, messages, function_schemas, model, openai_api_key):
+    # Handle OpenAI API response. Uses the tools API with parallel tool calls: every
+    # requested tool runs concurrently and all results are fed back in a single
+    # follow-up completion. Retries, circuit breaking and model fallback happen per
+    # call in utils/ai/resilience.py; the follow-up sticks to whichever model answered.
+    tool_results = []
+    try:
+        # Initial API call — only attach tools when the gate selected any
+        tool_kwargs = {}
+        if function_schemas:
+            tool_kwargs = {"tools": to_chat_tools(function_schemas), "tool_choice": "auto", "parallel_tool_calls": True}
+        response, model = await call_with_fallback(
+            lambda m: client.chat.completions.create(model=m, messages=messages, **tool_kwargs), model
+        )
+        choice = response.choices[0]
+        pending_action = None  # discord-side action returned up to on_message
+        tool_calls = choice.message.tool_calls or []
+
+        # Handle regular text response
+        if not tool_calls:
+            return choice, choice.message.content, pending_action
+
+        calls = [(tc.id, tc.function.name, tc.function.arguments) for tc in tool_calls]
+        tool_results = await execute_tool_calls(calls, client, messages, model, openai_api_key)
+        direct_answer, pending_action, web_context, followup_instructions = collect_tool_results(tool_results)
+
+        if direct_answer is not None:
+            # e.g. currency conversions only — the formatted result is the reply
+            return choice, direct_answer, pending_action
+
+        # One follow-up completion with every tool result (and the ack instruction
+        # for a prepared ping) appended to the unchanged conversation.
+        final_messages = messages + [
+            {
+                "role": "assistant",
+                "content": choice.message.content,
+                "tool_calls": [
+                    {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+                    for call_id, name, arguments in calls
+                ],
+            },
+            *({"role": "tool", "tool_call_id": call_id, "content": result["output"]} for call_id, result in tool_results),
+            *({"role": "system", "content": instruction} for instruction in followup_instructions),
+        ]
+        response2, _ = await call_with_fallback(
+            lambda m: client.chat.completions.create(model=m, messages=final_messages), model
+        )
+        answer = response2.choices[0].message.content
+        if web_context:
+            answer = append_sources(answer, web_context)
+
+        return choice, answer, pending_action  # Success, return the final answer
+
+    except asyncio.CancelledError:
+        # Trigger message was edited/deleted — drop any prepared ping work too
+        discard_pending_actions(tool_results)
+        raise
+    except Exception as e:
+        discard_pending_actions(tool_results)
+        print(f"OpenAI API Error: {e!r}")
+        if isinstance(e, ModelUnavailable):
+            return None, "⚠️ Sorry, I'm having trouble connecting to the AI service after multiple attempts. Please try again later.", None
+        return None, "⚠️ An unexpected error occurred while processing your request.", None
 
 
 async def send_response(message, answer, suppress_mentions=False):
@@ -414,31 +534,21 @@ async def send_response(message, answer, suppress_mentions=False):
 
 
 async def update_conversation_history(conversation, user_message_content, answer, user_id, display_name, username, active_conv_key, openai_api_key):
-    # Update the conversation history with the latest exchange
-    # Add user message with metadata
-    current_user_context = {"role": "user", "content": user_message_content}
-    
-    # Add assistant response with metadata
-    assistant_response_with_target = {
-        "role": "assistant", 
-        "content": answer,
-        "responding_to": {
-            "user_id": user_id,
-            "display_name": display_name,
-            "username": username
-        }
-    }
-    
-    conversation.append(current_user_context)
-    conversation.append(assistant_response_with_target)
-    
+    # Append the latest exchange to the Conversation (O(1) — the API view grows with it)
+    conversation.append(Message("user", user_message_content))
+    conversation.append(Message("assistant", answer, Speaker(user_id, display_name, username)))
+
     # Trim conversation if needed
-    conversation = await trim_conversation_by_tokens(
+    trimmed = await trim_conversation_by_tokens(
         conversation,
         max_tokens=55000,
         model="gpt-4.1-2025-04-14",
         openai_api_key=openai_api_key
     )
-    
+    if trimmed:
+        # The local history was rewritten, so a server-side Responses chain (if any)
+        # no longer matches it — replay the trimmed history next turn.
+        response_chains.pop(active_conv_key, None)
+
     user_conversations[active_conv_key] = conversation
-    return conversation
\ No newline at end of file
+    return conversation
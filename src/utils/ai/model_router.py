@@ -0,0 +1,80 @@
+# Heuristic model router behind the opt-in "Auto" entry in MODELS.
+#
+# Short, image-free banter goes to a Nano model; attachments, long or code-heavy
+# inputs and turns with a strong tool signal (currency, pings, an explicit ask for
+# fresh data) escalate to a heavier model. A plain question only gets web_search
+# offered by tool_gating, which isn't enough on its own to escalate. Every
+# decision is logged with latency and an estimated cost so the thresholds below can
+# be tuned from real traffic.
+import os
+import re
+from utils.conversation.context import MODELS
+from utils.ai.tool_gating import WEB_SEARCH, wants_fresh_data
+
+AUTO_MODEL_ID = "auto"
+
+
+def _router_model(env_var, default):
+    # Accept a MODELS label or a model id; anything else falls back to the default
+    value = os.getenv(env_var, default)
+    if value in MODELS and MODELS[value]["id"] != AUTO_MODEL_ID:
+        return value
+    for label, info in MODELS.items():
+        if info["id"] == value and value != AUTO_MODEL_ID:
+            return label
+    print(f"[router] {env_var}={value!r} is not a known model, using {default}")
+    return default
+
+
+ROUTER_LIGHT_MODEL = _router_model("ROUTER_LIGHT_MODEL", "GPT-5.4 Nano")
+ROUTER_HEAVY_MODEL = _router_model("ROUTER_HEAVY_MODEL", "GPT-5.4 Mini")
+ROUTER_LONG_INPUT_CHARS = 400   # past this, a message is no longer "banter"
+
+_HEAVY_HINTS_RE = re.compile(
+    r"```|\b(?:code|debug|error|stack ?trace|function|script|regex|sql|explain|calculate|solve|proof|"
+    r"step by step|compare|analy[sz]e|essay|translate)\b",
+    re.IGNORECASE,
+)
+
+
+def route_model(text, has_images=False, has_files=False, tool_names=None):
+    """Pick a MODELS label for this turn. Returns (label, reason)."""
+    text = text or ""
+    if has_images or has_files:
+        return ROUTER_HEAVY_MODEL, "attachment"
+    strong_tools = sorted(name for name in (tool_names or ()) if name != WEB_SEARCH)
+    if strong_tools:
+        return ROUTER_HEAVY_MODEL, f"tools:{','.join(strong_tools)}"
+    if tool_names and WEB_SEARCH in tool_names and wants_fresh_data(text):
+        return ROUTER_HEAVY_MODEL, f"tools:{WEB_SEARCH}"
+    if len(text) > ROUTER_LONG_INPUT_CHARS:
+        return ROUTER_HEAVY_MODEL, f"long input ({len(text)} chars)"
+    if _HEAVY_HINTS_RE.search(text):
+        return ROUTER_HEAVY_MODEL, "heavy keywords"
+    return ROUTER_LIGHT_MODEL, "short banter"
+
+
+def _price(label, field):
+    # MODELS prices are strings like "$0.20" per 1M tokens
+    try:
+        return float(MODELS[label][field].lstrip("$").replace(",", ""))
+    except (KeyError, ValueError):
+        return 0.0
+
+
+def _estimate_tokens(content):
+    # ~4 characters per token is close enough for routing telemetry
+    if isinstance(content, list):
+        return sum(len(str(part.get("text", ""))) if isinstance(part, dict) else len(str(part)) for part in content) // 4
+    return len(str(content or "")) // 4
+
+
+def log_routing_decision(label, reason, latency, messages, answer):
+    """Print one routing line: chosen model, why, latency and estimated cost."""
+    input_tokens = sum(_estimate_tokens(m.get("content")) for m in messages)
+    output_tokens = _estimate_tokens(answer)
+    cost = (input_tokens * _price(label, "input_cost") + output_tokens * _price(label, "output_cost")) / 1_000_000
+    print(
+        f"[router] model={label} reason={reason} latency={latency:.2f}s "
+        f"est_in={input_tokens} est_out={output_tokens} est_cost=${cost:.5f}"
+    )
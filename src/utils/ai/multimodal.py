@@ -43,24 +43,13 @@ async def filter_expired_images_from_content(content):
 
 
 async def clean_conversation_history(conversation):
-    # Remove expired image URLs from conversation history
-    cleaned_conversation = []
-
-    for message in conversation:
-        if isinstance(message, dict):
-            cleaned_message = message.copy()
-
-            # Check if message content contains multimodal data with images
-            content = cleaned_message.get("content")
-            if isinstance(content, list):
-                cleaned_content = await filter_expired_images_from_content(content)
-                cleaned_message["content"] = cleaned_content
-
-            cleaned_conversation.append(cleaned_message)
-        else:
-            cleaned_conversation.append(message)
-
-    return cleaned_conversation
+    # Remove expired image URLs from a Conversation in place. Only records that still
+    # carry images are checked, and nothing is copied.
+    for msg in conversation.image_messages():
+        filtered = await filter_expired_images_from_content(msg.content)
+        if len(filtered) != len(msg.content):
+            msg.content = filtered
+    return conversation
 
 
 # Multimodal content helpers
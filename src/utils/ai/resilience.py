@@ -0,0 +1,167 @@
+# Retry policy, per-model circuit breakers and model fallback for OpenAI calls.
+#
+# Errors are classified before anything is retried:
+#   - fatal (400/401/403/404/422, content errors): raised immediately, never retried;
+#   - retryable (429, 5xx, timeouts, connection errors): retried with jittered
+#     exponential backoff that honours Retry-After, and counted against the model's
+#     circuit breaker.
+# A breaker opens after BREAKER_THRESHOLD consecutive retryable failures and fails
+# fast for BREAKER_COOLDOWN seconds; after that one trial call is let through. When a
+# model's breaker is open or its retries run out, the call moves to the model's
+# "fallback" sibling from MODELS. Every call is bounded by CALL_DEADLINE overall, so
+# a partial outage can't keep a message (and its typing indicator) hanging.
+import os
+import time
+import random
+import asyncio
+import openai
+from utils.conversation.context import MODELS
+
+RETRY_ATTEMPTS = 3                  # attempts per model
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+MAX_RETRY_AFTER = 20.0              # longer Retry-After -> skip to the fallback instead
+CALL_DEADLINE = float(os.getenv("OPENAI_CALL_DEADLINE", "90"))  # seconds for all attempts
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 30.0
+
+_FATAL_ERRORS = (
+    openai.BadRequestError,
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+    openai.NotFoundError,
+    openai.UnprocessableEntityError,
+)
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+class ModelUnavailable(Exception):
+    """Every candidate model is failing or has its breaker open."""
+
+
+class CircuitBreaker:
+    __slots__ = ("failures", "opened_at", "trial_in_flight")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < BREAKER_COOLDOWN or self.trial_in_flight:
+            return False
+        self.trial_in_flight = True  # half-open: one trial call
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failures >= BREAKER_THRESHOLD:
+            self.opened_at = time.monotonic()
+
+
+_breakers = {}  # model id -> CircuitBreaker
+
+
+def _breaker(model_id):
+    breaker = _breakers.get(model_id)
+    if breaker is None:
+        breaker = _breakers[model_id] = CircuitBreaker()
+    return breaker
+
+
+def is_retryable(e):
+    if isinstance(e, _FATAL_ERRORS):
+        return False
+    if isinstance(e, openai.APIStatusError):
+        return e.status_code == 429 or e.status_code >= 500
+    return isinstance(e, _RETRYABLE_ERRORS)
+
+
+def retry_after(e):
+    # Seconds the server asked us to wait, if it said so
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt, e=None):
+    # Full-jitter exponential backoff, never shorter than a Retry-After hint
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    hint = retry_after(e) if e is not None else None
+    return max(delay, hint) if hint is not None else delay
+
+
+def fallback_chain(model_id):
+    # [model_id, its MODELS sibling, ...] without repeats
+    chain = [model_id]
+    label = next((name for name, info in MODELS.items() if info["id"] == model_id), None)
+    while label and MODELS[label].get("fallback"):
+        label = MODELS[label]["fallback"]
+        fallback_id = MODELS.get(label, {}).get("id")
+        if not fallback_id or fallback_id in chain:
+            break
+        chain.append(fallback_id)
+    return chain
+
+
+async def call_with_fallback(make_call, model_id):
+    """Run make_call(model) with retries, breakers and fallback.
+
+    Returns (result, model actually used). Fatal errors are raised as-is;
+    ModelUnavailable (chained to the last error) when every candidate failed.
+    """
+    deadline = time.monotonic() + CALL_DEADLINE
+    last_error = None
+    for candidate in fallback_chain(model_id):
+        breaker = _breaker(candidate)
+        if not breaker.allow():
+            print(f"[resilience] breaker open for {candidate}, skipping")
+            continue
+        if candidate != model_id:
+            print(f"[resilience] falling back from {model_id} to {candidate}")
+        for attempt in range(RETRY_ATTEMPTS):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ModelUnavailable(f"deadline exceeded calling {model_id}") from last_error
+            try:
+                result = await asyncio.wait_for(make_call(candidate), timeout=remaining)
+            except asyncio.CancelledError:
+                breaker.trial_in_flight = False
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.trial_in_flight = False
+                    raise
+                last_error = e
+                breaker.record_failure()
+                print(f"[resilience] {candidate} attempt {attempt + 1}/{RETRY_ATTEMPTS} failed: {e}")
+                hint = retry_after(e)
+                if breaker.opened_at is not None or (hint is not None and hint > MAX_RETRY_AFTER):
+                    break  # this model is unhealthy right now — move to the sibling
+                if attempt + 1 < RETRY_ATTEMPTS:
+                    await asyncio.sleep(min(backoff_delay(attempt, e), max(0.0, deadline - time.monotonic())))
+                continue
+            breaker.record_success()
+            return result, candidate
+    raise ModelUnavailable(f"no healthy model for {model_id}") from last_error
@@ -0,0 +1,206 @@
+# Optional server-side conversation state via the OpenAI Responses API.
+#
+# In the default chat-completions mode every turn resends the whole conversation
+# (persona + up to 55k tokens of history). With OPENAI_RESPONSES_MODE enabled, each
+# conversation key keeps the id of its latest stored response and the next turn only
+# sends the new user message (plus any tool outputs) with `previous_response_id`.
+# The persona still goes out as `instructions` — those are never inherited across a
+# chain — but the history does not.
+#
+# The local history in user_conversations is still maintained every turn, so when a
+# chain is missing, idle past RESPONSES_CHAIN_TTL, or rejected by the API (expired /
+# deleted), the turn falls back to a full replay of that history and starts a new
+# chain. Anything that rewrites the local history (trim/summary, reset, persona switch,
+# TLDR context injection) drops the chain via invalidate_response_chain, and so does a
+# cancelled turn, whose request may already have been stored server-side.
+#
+# Per-turn system notes (TLDR transcript excerpts, retrieved persona passages) are
+# appended to that turn's `instructions` rather than sent as input items: input is
+# stored in the chain and would be resent with every later turn, instructions aren't.
+import os
+import time
+import asyncio
+import openai
+from utils.conversation.context import response_chains
+from utils.ai.resilience import call_with_fallback, ModelUnavailable
+from utils.ai.message_processing import (
+    append_sources, execute_tool_calls, collect_tool_results, discard_pending_actions
+)
+
+RESPONSES_MODE = os.getenv("OPENAI_RESPONSES_MODE", "").lower() in ("1", "true", "yes", "on")
+RESPONSES_CHAIN_TTL = int(os.getenv("OPENAI_RESPONSES_CHAIN_TTL", str(6 * 3600)))  # idle seconds before a full replay
+
+
+def get_response_chain(conv_key):
+    # Return the live chain state for a conversation, or None if it must be replayed
+    chain = response_chains.get(conv_key)
+    if not chain:
+        return None
+    if time.time() - chain["updated_at"] > RESPONSES_CHAIN_TTL:
+        response_chains.pop(conv_key, None)
+        return None
+    return chain
+
+
+def set_response_chain(conv_key, response_id, pending_input=None):
+    # pending_input: items that must lead the next turn's input (e.g. the output of a
+    # tool call that was answered locally without a follow-up response)
+    response_chains[conv_key] = {
+        "response_id": response_id,
+        "pending_input": pending_input or [],
+        "updated_at": time.time(),
+    }
+
+
+def invalidate_response_chain(conv_key):
+    # Force the next turn for this conversation to replay the local history
+    response_chains.pop(conv_key, None)
+
+
+def _convert_content(role, content):
+    # Chat-completions content -> Responses API input content
+    if not isinstance(content, list):
+        return "" if content is None else str(content)
+    text_type = "output_text" if role == "assistant" else "input_text"
+    parts = []
+    for part in content:
+        if not isinstance(part, dict):
+            parts.append({"type": text_type, "text": str(part)})
+        elif part.get("type") == "text":
+            parts.append({"type": text_type, "text": part.get("text", "")})
+        elif part.get("type") == "image_url" and role != "assistant":
+            parts.append({"type": "input_image", "image_url": part.get("image_url", {}).get("url", "")})
+    return parts
+
+
+def to_input_items(messages):
+    # Convert chat-completions style messages into Responses API input items
+    return [
+        {"role": msg["role"], "content": _convert_content(msg["role"], msg.get("content"))}
+        for msg in messages
+    ]
+
+
+def to_response_tools(function_schemas):
+    # Bare function schemas -> Responses API function tools
+    return [
+        {
+            "type": "function",
+            "name": schema["name"],
+            "description": schema.get("description", ""),
+            "parameters": schema.get("parameters", {"type": "object", "properties": {}}),
+        }
+        for schema in function_schemas or []
+    ]
+
+
+def _is_chain_error(e):
+    # The stored response behind previous_response_id is gone (expired, deleted, or
+    # from a different project) — recoverable by replaying the local history
+    if isinstance(e, openai.NotFoundError):
+        return True
+    return isinstance(e, openai.BadRequestError) and "previous_response" in str(e)
+
+
+def _tool_output(call_id, output):
+    return {"type": "function_call_output", "call_id": call_id, "output": output}
+
+
+async def _create(client, model, instructions, input_items, function_schemas, previous_response_id):
+    kwargs = {
+        "model": model,
+        "instructions": instructions,
+        "input": input_items,
+        "store": True,
+    }
+    if previous_response_id:
+        kwargs["previous_response_id"] = previous_response_id
+    tools = to_response_tools(function_schemas)
+    if tools:
+        kwargs["tools"] = tools
+        kwargs["parallel_tool_calls"] = True
+    # Chain errors are fatal to resilience and surface here for the replay logic
+    response, _ = await call_with_fallback(lambda m: client.responses.create(**{**kwargs, "model": m}), model)
+    return response
+
+
+async def handle_responses_turn(client, conv_key, messages, function_schemas, model, openai_api_key):
+    # Responses API counterpart of handle_openai_response. `messages` is the same full
+    # [system, *history, user] list the chat path would send; only the pieces the
+    # server doesn't already have are actually transmitted.
+    # Returns (response, answer, pending_action) like handle_openai_response.
+    instructions = messages[0]["content"] if messages and messages[0]["role"] == "system" else None
+    # Per-turn system notes sit right before the user message; they ride along in this
+    # turn's instructions so they reach the model without persisting in the chain
+    start = 1 if instructions is not None else 0
+    split = len(messages) - 1
+    while split > start and messages[split - 1]["role"] == "system":
+        split -= 1
+    history = messages[start:split]
+    notes = [str(msg.get("content") or "") for msg in messages[split:-1]]
+    if notes:
+        instructions = "\n\n".join([instructions or "", *notes]).strip()
+    user_item = to_input_items(messages[-1:])
+    chain = get_response_chain(conv_key)
+    tool_results = []
+    try:
+        if chain:
+            input_items = chain["pending_input"] + user_item
+            try:
+                response = await _create(client, model, instructions, input_items, function_schemas, chain["response_id"])
+            except Exception as e:
+                if not _is_chain_error(e):
+                    raise
+                print(f"[responses] chain for {conv_key} expired, replaying full history: {e}")
+                invalidate_response_chain(conv_key)
+                chain = None
+        if not chain:
+            input_items = to_input_items(history) + user_item
+            response = await _create(client, model, instructions, input_items, function_schemas, None)
+
+        pending_action = None
+        calls = [item for item in response.output if getattr(item, "type", None) == "function_call"]
+
+        if not calls:
+            answer = response.output_text
+            set_response_chain(conv_key, response.id)
+            return response, answer, pending_action
+
+        # Run every requested tool concurrently, then feed all outputs back at once
+        call_tuples = [(call.call_id, call.name, call.arguments) for call in calls]
+        tool_results = await execute_tool_calls(call_tuples, client, messages, model, openai_api_key)
+        direct_answer, pending_action, web_context, followup_instructions = collect_tool_results(tool_results)
+        outputs = [_tool_output(call_id, result["output"]) for call_id, result in tool_results]
+
+        if direct_answer is not None:
+            # Answered locally with no follow-up response, so the tool outputs and the
+            # reply lead the next turn's input to keep the server-side chain complete.
+            set_response_chain(conv_key, response.id, outputs + [{"role": "assistant", "content": direct_answer}])
+            return response, direct_answer, pending_action
+
+        followups = [{"role": "system", "content": instruction} for instruction in followup_instructions]
+        try:
+            response2 = await _create(client, model, instructions, outputs + followups, None, response.id)
+        except Exception:
+            # The chain now ends in unanswered tool calls — start over next time
+            invalidate_response_chain(conv_key)
+            raise
+        answer = response2.output_text
+        if web_context:
+            answer = append_sources(answer, web_context)
+        set_response_chain(conv_key, response2.id)
+        return response, answer, pending_action
+
+    except asyncio.CancelledError:
+        # Trigger message was edited/deleted — drop any prepared ping work too, and
+        # replay the local history next turn: the abandoned request may have been stored
+        discard_pending_actions(tool_results)
+        invalidate_response_chain(conv_key)
+        raise
+    except Exception as e:
+        discard_pending_actions(tool_results)
+        print(f"OpenAI Responses API Error: {e!r}")
+        if isinstance(e, ModelUnavailable):
+            return None, "⚠️ Sorry, I'm having trouble connecting to the AI service after multiple attempts. Please try again later.", None
+
+    return None, "⚠️ An unexpected error occurred while processing your request.", None
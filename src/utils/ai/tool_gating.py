@@ -0,0 +1,97 @@
+# Cheap local pre-classifier that decides which tools (and tool-specific system
+# instructions) a message could possibly need, so casual turns like "lol" don't ship
+# a thousand-plus tokens of tool descriptions with every completion.
+#
+# It is deliberately recall-oriented: a false positive only costs the schema tokens
+# (the model still decides whether to call the tool), while a false negative makes
+# the tool unavailable for that turn. Follow-ups ("yes do it", "and in euros?") carry
+# no signal of their own, so a tool offered on one turn stays offered for the next.
+import re
+from utils.core.ttl_cache import TTLCache
+
+WEB_SEARCH = "web_search"
+CONVERT_CURRENCY = "convert_currency"
+PING_USER = "ping_user"
+
+# Factual / time-sensitive phrasing that suggests the answer may need fresh data
+_SEARCH_KEYWORDS_RE = re.compile(
+    r"\b(?:latest|newest|recent(?:ly)?|news|today|tonight|yesterday|tomorrow|this (?:week|month|year|season)|"
+    r"current(?:ly)?|right now|still|price|prices|cost|costs|worth|score|scores|results?|standings|"
+    r"weather|forecast|release(?:d| date)?|launch(?:ed)?|update|version|patch|stock|market|"
+    r"schedule|rumou?rs?|announced?|leaks?|specs?|review|reviews|ranking|record|"
+    r"search|look(?:\s+it)?\s+up|google|source|sources|fact[- ]?check|is it true|"
+    r"election|president|ceo|died|dead|alive|married|net worth|how old|how many|how much)\b",
+    re.IGNORECASE,
+)
+_QUESTION_START_RE = re.compile(
+    r"^\s*(?:who|what|whats|what's|when|where|which|why|how|is|are|was|were|does|did|do|can|will|has|have)\b",
+    re.IGNORECASE,
+)
+_YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+_CURRENCY_CODES = (
+    "usd|eur|gbp|jpy|cny|rmb|cad|aud|nzd|chf|inr|krw|mxn|brl|php|vnd|thb|sgd|hkd|twd|"
+    "sek|nok|dkk|pln|czk|huf|zar|aed|sar|ils|rub|idr|myr|ars|clp|cop|pen|egp|ngn|pkr"
+)
+_CURRENCY_RE = re.compile(
+    r"[$€£¥₹₩₱₫]|\b(?:" + _CURRENCY_CODES + r")\b|"
+    r"\b(?:dollars?|bucks|euros?|pounds?|quid|yen|yuan|pesos?|rupees?|won|dong|baht|francs?|"
+    r"krona|krone|zloty|reais|rand|lira|rubles?|ringgit|dirhams?|currency|currencies|"
+    r"exchange rate|convert|conversion)\b",
+    re.IGNORECASE,
+)
+_AMOUNT_RE = re.compile(r"\d")
+
+_PING_RE = re.compile(
+    r"\b(?:ping|pings|pinging|spam|spamming|remind|reminder|notify|tag|dm|message|msg|tell|"
+    r"wake (?:him|her|them|me|up)|blow up|annoy)\b|\bin \d+\s*(?:s|sec|secs|seconds?|m|min|mins|minutes?|h|hr|hrs|hours?|d|days?)\b",
+    re.IGNORECASE,
+)
+_MENTION_RE = re.compile(r"<@!?\d+>")
+
+FOLLOW_UP_TTL = 600                 # a reply after 10 minutes isn't a follow-up any more
+_offered = TTLCache(maxsize=2048, ttl=FOLLOW_UP_TTL)  # conversation key -> tools selected last turn
+
+
+def wants_fresh_data(text):
+    """True when the message explicitly asks for current/searched information,
+    as opposed to merely being phrased as a question."""
+    return bool(_SEARCH_KEYWORDS_RE.search(_MENTION_RE.sub(" ", text or "")))
+
+
+def select_tools(text, mentions_other_user=False, conv_key=None):
+    """Return the set of tool names this message could plausibly need.
+
+    `mentions_other_user` should be True when the message @-mentions someone other
+    than the bot — a strong signal for `ping_user` even without a trigger word.
+    With a `conv_key`, tools this message selects on its own are remembered and also
+    offered on that conversation's next turn (one follow-up, not indefinitely).
+    """
+    text = text or ""
+    # The bot's own trigger mention isn't content
+    stripped = _MENTION_RE.sub(" ", text).strip()
+    tools = set()
+
+    if (
+        "?" in stripped
+        or _QUESTION_START_RE.search(stripped)
+        or _SEARCH_KEYWORDS_RE.search(stripped)
+        or _YEAR_RE.search(stripped)
+        or len(stripped.split()) >= 15
+    ):
+        tools.add(WEB_SEARCH)
+
+    if _CURRENCY_RE.search(stripped) and _AMOUNT_RE.search(stripped):
+        tools.add(CONVERT_CURRENCY)
+    elif re.search(r"\b(?:convert|exchange rate)\b", stripped, re.IGNORECASE):
+        tools.add(CONVERT_CURRENCY)
+
+    if mentions_other_user or _PING_RE.search(stripped):
+        tools.add(PING_USER)
+
+    if conv_key is not None:
+        carried = _offered.get(conv_key) or set()
+        _offered.set(conv_key, frozenset(tools))
+        tools |= carried
+
+    return tools
@@ -0,0 +1,107 @@
+# Compact per-conversation history with an incrementally maintained API view.
+#
+# Each turn used to copy every message dict (clean_conversation_history) and then
+# rebuild a fresh [{"role", "content"}] list from scratch; every stored conversation
+# also carried its own copy of the (very large) persona prompt and a responding_to
+# dict per assistant message. Here:
+#   - messages are slotted records with interned role strings and a slotted Speaker;
+#   - each record owns exactly one API dict, created once and shared by the view, so
+#     appending a message is O(1) and nothing is copied per turn;
+#   - the system prompt is a reference set per turn, never stored in the history;
+#   - token counts are cached on the record and reused by the trimmer.
+import sys
+
+SYSTEM = sys.intern("system")
+USER = sys.intern("user")
+ASSISTANT = sys.intern("assistant")
+
+
+class Speaker:
+    """Who an assistant message was answering (used to resume foreign conversations)."""
+
+    __slots__ = ("user_id", "display_name", "username")
+
+    def __init__(self, user_id, display_name, username):
+        self.user_id = user_id
+        self.display_name = display_name
+        self.username = username
+
+
+class Message:
+    __slots__ = ("role", "api", "responding_to", "tokens")
+
+    def __init__(self, role, content, responding_to=None):
+        self.role = sys.intern(role)
+        self.api = {"role": self.role, "content": content}  # the dict sent to the API
+        self.responding_to = responding_to
+        self.tokens = None  # cached token count, filled by the trimmer
+
+    @property
+    def content(self):
+        return self.api["content"]
+
+    @content.setter
+    def content(self, value):
+        # Mutated in place so the conversation's API view stays valid
+        self.api["content"] = value
+        self.tokens = None
+
+    def text(self):
+        # Plain-text content (multimodal parts joined)
+        content = self.api["content"]
+        if isinstance(content, list):
+            return " ".join(
+                part.get("text", "") for part in content if isinstance(part, dict) and "text" in part
+            )
+        return content or ""
+
+    def has_images(self):
+        content = self.api["content"]
+        return isinstance(content, list) and any(
+            isinstance(part, dict) and part.get("type") == "image_url" for part in content
+        )
+
+
+class Conversation:
+    """Ordered message records plus the matching list of API dicts."""
+
+    __slots__ = ("system_prompt", "messages", "_view")
+
+    def __init__(self, system_prompt=None):
+        self.system_prompt = system_prompt
+        self.messages = []
+        self._view = []  # [m.api for m in messages], maintained alongside
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def append(self, message):
+        self.messages.append(message)
+        self._view.append(message.api)
+        return message
+
+    def insert(self, index, message):
+        self.messages.insert(index, message)
+        self._view.insert(index, message.api)
+        return message
+
+    def drop_oldest(self, count):
+        # Remove the `count` oldest records (used by the trimmer); returns them
+        dropped = self.messages[:count]
+        del self.messages[:count]
+        del self._view[:count]
+        return dropped
+
+    def last_assistant(self):
+        return next((m for m in reversed(self.messages) if m.role is ASSISTANT), None)
+
+    def image_messages(self):
+        return [m for m in self.messages if m.has_images()]
+
+    def api_messages(self, *extra):
+        """[system, *history, *extra] as API dicts — a shallow list, no dict copies."""
+        head = [{"role": SYSTEM, "content": self.system_prompt}] if self.system_prompt else []
+        return head + self._view + list(extra)
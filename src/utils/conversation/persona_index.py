@@ -0,0 +1,136 @@
+# Retrieval-based conditioning for the real-member personas (Jagbir, Lemon, Epoe).
+#
+# Their prompt files are 110–170KB of analysed Discord logs (~30–45k tokens). Sending
+# the whole file every turn eats most of the trim budget and most of each request's
+# cost. Instead each file is indexed once into:
+#   - a compact style sheet: the identity/server header plus the signature phrases
+#     pulled from the bolded "**"phrase"**" entries, sent every turn, and
+#   - a passage index (blank-line separated blocks, long ones split on bullets) scored
+#     with local BM25, from which only the few passages most relevant to the current
+#     exchange are attached.
+# Only the static style sheet goes in the system prompt, so that prefix is identical
+# every turn and stays cacheable; the retrieved examples are sent as a separate system
+# message right before the user turn (like TLDR transcript excerpts in bot.py).
+import os
+import re
+from utils.core.bm25 import BM25Index
+
+PERSONA_RETRIEVAL = os.getenv("PERSONA_RETRIEVAL", "1").lower() not in ("0", "false", "no", "off")
+PERSONA_TOP_K = 6                   # passages attached per turn
+PERSONA_PASSAGE_BUDGET = 6000       # max characters of retrieved passages per turn
+MAX_PASSAGE_CHARS = 1200            # longer blocks are split on bullet boundaries
+MAX_SIGNATURE_PHRASES = 60
+
+# First analysis section heading — everything before it is identity/server context
+_SECTION_START_RE = re.compile(r"^(?:=====|#{1,4}\s|\*\*\d+\.)", re.MULTILINE)
+_HEADING_RE = re.compile(r"^\s*(?:=====.*=====|#{1,4}\s.+|\*\*[^*\n]{3,80}\*\*:?)\s*$")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+\.)\s")
+_PHRASE_RE = re.compile(r"\*\*\s*[\"“]([^\"”\n]{1,40})[\"”]")
+
+_indexes = {}  # persona name -> PersonaIndex
+
+
+def _split_block(block):
+    # Split an oversized block into bullet-aligned pieces of at most MAX_PASSAGE_CHARS
+    if len(block) <= MAX_PASSAGE_CHARS:
+        return [block]
+    pieces, current = [], []
+    size = 0
+    for line in block.splitlines():
+        if current and size + len(line) > MAX_PASSAGE_CHARS and _BULLET_RE.match(line):
+            pieces.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+class PersonaIndex:
+    """Style sheet + BM25 passage index for one persona file."""
+
+    def __init__(self, text):
+        match = _SECTION_START_RE.search(text)
+        header_end = match.start() if match else min(len(text), 6000)
+        header = text[:header_end].strip()
+        body = text[header_end:]
+
+        phrases = []
+        for phrase in _PHRASE_RE.findall(body):
+            phrase = phrase.strip()
+            if phrase and phrase.lower() not in {p.lower() for p in phrases}:
+                phrases.append(phrase)
+            if len(phrases) >= MAX_SIGNATURE_PHRASES:
+                break
+        self.style_sheet = header
+        if phrases:
+            self.style_sheet += "\n\nSignature phrases and slang you use: " + ", ".join(f'"{p}"' for p in phrases)
+
+        # Passages keep their nearest section heading so a retrieved bullet still says
+        # what it is an example of
+        self.passages = []
+        heading = ""
+        for block in re.split(r"\n\s*\n", body):
+            block = block.strip()
+            if not block:
+                continue
+            first_line = block.splitlines()[0]
+            if _HEADING_RE.match(first_line):
+                heading = first_line.strip("*#= :")
+                if len(block.splitlines()) == 1:
+                    continue
+            for piece in _split_block(block):
+                self.passages.append((heading, piece))
+
+        self.bm25 = BM25Index([f"{h} {p}" for h, p in self.passages])
+
+    def search(self, query, k=PERSONA_TOP_K):
+        # Indices of the top-k passages by BM25 score (only those that match at all)
+        return self.bm25.search(query, k)
+
+    def build_notes(self, query):
+        # The passages most relevant to this exchange, within budget.
+        # With no matches, fall back to the opening passages (language & slang analysis).
+        ranked = self.search(query) or list(range(min(PERSONA_TOP_K, len(self.passages))))
+        chunks, used = {}, 0
+        for i in ranked:  # best matches claim the budget first
+            heading, passage = self.passages[i]
+            chunk = f"[{heading}]\n{passage}" if heading else passage
+            if used + len(chunk) > PERSONA_PASSAGE_BUDGET and chunks:
+                break
+            chunks[i] = chunk
+            used += len(chunk)
+        examples = [chunks[i] for i in sorted(chunks)]  # file order so related bullets read naturally
+        if not examples:
+            return ""
+        return (
+            "Reference notes and real example messages most relevant to the current conversation "
+            "(match this voice, don't quote them back verbatim):\n\n"
+            + "\n\n".join(examples)
+        )
+
+
+def get_persona_index(persona, loader):
+    # Build (once) and return the index for a persona, given its file loader
+    index = _indexes.get(persona)
+    if index is None:
+        index = PersonaIndex(loader())
+        _indexes[persona] = index
+        print(f"[persona] indexed {persona}: {len(index.passages)} passages, style sheet {len(index.style_sheet)} chars")
+    return index
+
+
+def build_persona_prompt(persona, loader):
+    """Static persona text for the system prompt — the style sheet when retrieval is
+    enabled, the full file otherwise."""
+    if not PERSONA_RETRIEVAL:
+        return loader()
+    return get_persona_index(persona, loader).style_sheet
+
+
+def build_persona_notes(persona, loader, query):
+    """Retrieved example passages for this turn ("" when retrieval is disabled)."""
+    if not PERSONA_RETRIEVAL:
+        return ""
+    return get_persona_index(persona, loader).build_notes(query)
@@ -0,0 +1,50 @@
+# Small local BM25 ranker shared by persona retrieval and TLDR transcript retrieval
+import re
+import math
+from collections import Counter
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_STOPWORDS = {
+    "the", "a", "an", "and", "or", "but", "to", "of", "in", "on", "for", "with", "at", "by", "is",
+    "are", "was", "were", "be", "it", "this", "that", "as", "i", "you", "he", "she", "they", "we",
+    "his", "her", "their", "my", "your", "its", "from", "about", "so", "just", "do", "does", "did",
+}
+
+
+def tokenize(text):
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS and len(w) > 1]
+
+
+class BM25Index:
+    """BM25 over a fixed list of documents (strings)."""
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, documents):
+        self.doc_terms = [Counter(tokenize(doc)) for doc in documents]
+        self.doc_lens = [sum(c.values()) for c in self.doc_terms]
+        self.avg_len = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+        df = Counter()
+        for terms in self.doc_terms:
+            df.update(terms.keys())
+        n = len(self.doc_terms)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def search(self, query, k):
+        # Indices of the top-k documents by BM25 score (only those that match at all)
+        terms = set(tokenize(query or ""))
+        if not terms or not self.doc_terms:
+            return []
+        scores = []
+        for i, doc in enumerate(self.doc_terms):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lens[i] / (self.avg_len or 1))
+            for term in terms:
+                tf = doc.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(reverse=True)
+        return [i for _, i in scores[:k]]
@@ -0,0 +1,96 @@
+# Tokenizer access that never blocks the event loop.
+#
+# tiktoken encodes in native code and releases the GIL, so large jobs (megabytes of
+# web page text, a 55k-token conversation) run in a small dedicated thread pool while
+# the loop keeps serving heartbeats and other users. Short strings are still encoded
+# inline — a thread hop costs more than encoding a chat message.
+#
+# Every cl100k token covers at least one byte of UTF-8, so a string whose byte length
+# is within a limit is guaranteed to fit without encoding it at all (the fast path).
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+ENCODING_NAME = "cl100k_base"
+INLINE_MAX_CHARS = 4000   # below this, encode on the loop instead of hopping threads
+
+_encoder = None
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tokenizer")
+
+
+def get_encoder():
+    # The shared encoder; loading it the first time reads (or downloads) the BPE table
+    global _encoder
+    if _encoder is None:
+        import tiktoken
+        _encoder = tiktoken.get_encoding(ENCODING_NAME)
+    return _encoder
+
+
+async def preload_encoders():
+    """Load the encoder off-loop at startup so the first real message doesn't pay for it."""
+    await asyncio.get_running_loop().run_in_executor(_executor, get_encoder)
+    print(f"[tokens] {ENCODING_NAME} encoder ready")
+
+
+def fits_within(text, max_tokens):
+    # Length-only check: True means the text certainly fits; False means "encode to know"
+    return len(text) <= max_tokens and len(text.encode("utf-8")) <= max_tokens
+
+
+def count_text_tokens(text):
+    return len(get_encoder().encode_ordinary(text))
+
+
+def _message_value_tokens(value):
+    if isinstance(value, list):
+        total = 0
+        for part in value:
+            if isinstance(part, dict):
+                total += sum(count_text_tokens(str(v)) for v in part.values())
+            else:
+                total += count_text_tokens(str(part))
+        return total
+    return count_text_tokens(str(value))
+
+
+def count_message_tokens(msg):
+    # Chat-format overhead (4) plus every field except local bookkeeping
+    return 4 + sum(
+        _message_value_tokens(value) for key, value in msg.items() if key != "responding_to"
+    )
+
+
+def count_messages_tokens(messages):
+    return sum(count_message_tokens(msg) for msg in messages) + 2
+
+
+def _truncate_sync(text, max_tokens):
+    enc = get_encoder()
+    tokens = enc.encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def count_text_tokens_async(text):
+    if len(text) <= INLINE_MAX_CHARS:
+        return count_text_tokens(text)
+    return await _run(count_text_tokens, text)
+
+
+async def count_message_tokens_async(messages):
+    """Per-message token counts for a list of chat messages, computed off-loop."""
+    return await _run(lambda: [count_message_tokens(msg) for msg in messages])
+
+
+async def truncate_to_tokens(text, max_tokens):
+    """Cut text to at most max_tokens tokens without encoding on the event loop."""
+    if fits_within(text, max_tokens):
+        return text
+    if len(text) <= INLINE_MAX_CHARS:
+        return _truncate_sync(text, max_tokens)
+    return await _run(_truncate_sync, text, max_tokens)
@@ -0,0 +1,331 @@
+import io
+import bisect
+import asyncio
+from openai import AsyncOpenAI
+
+# Audio helpers for the TLDR pipeline (PyAV — bundled FFmpeg libs, no ffmpeg binary).
+#
+# Large uploads are normalized for speech first: 16 kHz mono at a low bitrate (Opus
+# in Ogg, or AAC in m4a when the bundled FFmpeg lacks libopus) — several times smaller
+# than the source track, with no loss Whisper would notice. Small tracks in a codec
+# Whisper accepts are only remuxed (see video._extract_audio_track_sync).
+#
+# Long media is transcribed in chunks: the audio is decoded once to 16 kHz mono PCM,
+# split near CHUNK_SECONDS at the quietest point of a search window (so words aren't
+# cut), padded with a little overlap on each side, and the chunks go to Whisper
+# concurrently. Segment timestamps are shifted back onto the source timeline and each
+# chunk only keeps the segments whose midpoint falls in its own span, which removes
+# the duplicated overlap.
+#
+# Before any of that, an energy-based voice-activity pass cuts long quiet stretches
+# (dead air in clips and screen recordings) so Whisper doesn't bill for them. An
+# OffsetMap keeps the cuts, and every segment timestamp is mapped back onto the
+# original media's timeline.
+
+SAMPLE_RATE = 16000                 # Whisper resamples to 16 kHz mono anyway
+SPEECH_BITRATE = 24_000             # plenty for speech in Opus; AAC fallback gets 32k
+NORMALIZE_MIN_BYTES = 8 * 1024 * 1024  # smaller uploads go as-is (remuxed or original) — no decode
+CHUNK_SECONDS = 600                 # target chunk length (~1.8 MB of Opus)
+CHUNK_SEARCH_SECONDS = 30           # look this far either side of the target for silence
+CHUNK_OVERLAP_SECONDS = 2.0
+SILENCE_WINDOW_SECONDS = 0.5
+WHISPER_CONCURRENCY = 4             # parallel Whisper requests per job
+VAD_FRAME_SECONDS = 0.03
+VAD_MIN_SILENCE_SECONDS = 1.5       # only quiet stretches at least this long are cut
+VAD_PAD_SECONDS = 0.25              # audio kept either side of a cut
+VAD_MIN_SAVINGS = 0.10              # trim only when it removes ≥10% of the audio
+
+
+def probe_duration(path: str) -> float | None:
+    """Container duration in seconds via PyAV, or None if unknown."""
+    import av
+    try:
+        with av.open(path) as c:
+            if c.duration:
+                return c.duration / 1_000_000
+            stream = next((s for s in c.streams if s.type == "audio"), None)
+            if stream is not None and stream.duration and stream.time_base:
+                return float(stream.duration * stream.time_base)
+    except Exception:
+        pass
+    return None
+
+
+def decode_pcm(path: str, max_seconds: float | None = None):
+    """
+    Decode the first audio track to a 16 kHz mono int16 numpy array.
+    With max_seconds, longer media raises ValueError: checked from the container
+    before decoding, and against the decoded length as it goes (container durations
+    can be missing or wrong), so memory stays bounded either way.
+    """
+    import av
+    import numpy as np
+
+    too_long = f"Audio is too long — max {int(max_seconds or 0) // 60} minutes."
+    if max_seconds:
+        duration = probe_duration(path)
+        if duration and duration > max_seconds:
+            raise ValueError(too_long)
+    max_samples = int(max_seconds * SAMPLE_RATE) if max_seconds else None
+
+    parts, decoded = [], 0
+    with av.open(path) as c:
+        if not any(s.type == "audio" for s in c.streams):
+            raise ValueError("No audio track found in this file.")
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        for frame in c.decode(audio=0):
+            for out in resampler.resample(frame):
+                parts.append(out.to_ndarray().reshape(-1))
+                decoded += len(parts[-1])
+            if max_samples and decoded > max_samples:
+                raise ValueError(too_long)
+        for out in resampler.resample(None):  # flush
+            parts.append(out.to_ndarray().reshape(-1))
+    if not parts:
+        return np.zeros(0, dtype=np.int16)
+    return np.concatenate(parts).astype(np.int16, copy=False)
+
+
+def _quietest_point(pcm, lo: int, hi: int) -> int:
+    # Sample index at the centre of the lowest-energy window in pcm[lo:hi]
+    import numpy as np
+
+    win = int(SILENCE_WINDOW_SECONDS * SAMPLE_RATE)
+    region = pcm[lo:hi].astype(np.float32)
+    n = len(region) // win
+    if n < 1:
+        return (lo + hi) // 2
+    energy = (region[: n * win].reshape(n, win) ** 2).mean(axis=1)
+    return lo + int(energy.argmin()) * win + win // 2
+
+
+def plan_chunks(pcm) -> list[tuple[int, int]]:
+    """Split points as (start, end) sample ranges covering pcm without gaps."""
+    total = len(pcm)
+    target = CHUNK_SECONDS * SAMPLE_RATE
+    search = CHUNK_SEARCH_SECONDS * SAMPLE_RATE
+    bounds, start = [], 0
+    while total - start > target + search:
+        cut = _quietest_point(pcm, start + target - search, start + target + search)
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, total))
+    return bounds
+
+
+# (codec, container format, file extension, bitrate) in order of preference
+_SPEECH_CODECS = [("libopus", "ogg", "ogg", SPEECH_BITRATE), ("aac", "mp4", "m4a", 32_000)]
+_speech_codec = None
+
+
+def speech_codec() -> tuple[str, str, str, int]:
+    """First speech codec the bundled FFmpeg can encode."""
+    global _speech_codec
+    if _speech_codec is None:
+        import av
+        for entry in _SPEECH_CODECS:
+            try:
+                av.codec.Codec(entry[0], "w")
+                _speech_codec = entry
+                break
+            except Exception:
+                continue
+        else:
+            raise ValueError("No speech encoder available in this PyAV build.")
+    return _speech_codec
+
+
+def open_speech_stream(out_container):
+    # Add a 16 kHz mono low-bitrate speech stream to an output container
+    codec, _, _, bit_rate = speech_codec()
+    stream = out_container.add_stream(codec, rate=SAMPLE_RATE)
+    stream.codec_context.layout = "mono"
+    stream.codec_context.bit_rate = bit_rate
+    return stream
+
+
+def encode_speech(pcm) -> tuple[bytes, str]:
+    """16 kHz mono int16 PCM → (encoded bytes, file extension) in the speech codec."""
+    import av
+
+    _, fmt, ext, _ = speech_codec()
+    buf = io.BytesIO()
+    with av.open(buf, "w", format=fmt) as out:
+        stream = open_speech_stream(out)
+        step = SAMPLE_RATE  # feed one second per frame; the encoder re-frames as needed
+        for i in range(0, len(pcm), step):
+            frame = av.AudioFrame.from_ndarray(pcm[i:i + step].reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = SAMPLE_RATE
+            frame.pts = None
+            for packet in stream.encode(frame):
+                out.mux(packet)
+        for packet in stream.encode(None):  # flush
+            out.mux(packet)
+    return buf.getvalue(), ext
+
+
+def log_bytes_saved(label: str, before: int, after: int) -> None:
+    saved = before - after
+    pct = (saved / before * 100) if before else 0
+    print(f"[audio] {label}: {before} → {after} bytes (saved {saved} bytes, {pct:.0f}%)")
+
+
+async def transcribe_file_segments(openai_client: AsyncOpenAI, file) -> list[dict]:
+    """One Whisper request (file object, or (filename, bytes)) → timestamped segments."""
+    resp = await openai_client.audio.transcriptions.create(
+        model="whisper-1",
+        file=file,
+        response_format="verbose_json",
+    )
+    segments = getattr(resp, "segments", None) or []
+    if not segments and getattr(resp, "text", ""):
+        return [{"start": 0.0, "end": float(getattr(resp, "duration", 0) or 0), "text": resp.text}]
+    return [
+        {"start": float(seg.start), "end": float(seg.end), "text": seg.text}
+        for seg in segments
+    ]
+
+
+async def transcribe_pcm(pcm, openai_client: AsyncOpenAI, source_bytes: int = 0) -> list[dict]:
+    """
+    Chunked, concurrent Whisper transcription of 16 kHz mono PCM (a single request
+    when it fits in one chunk). Returns segments [{"start", "end", "text"}] on the
+    PCM's own timeline.
+    """
+    loop = asyncio.get_event_loop()
+    bounds = plan_chunks(pcm)
+    overlap = int(CHUNK_OVERLAP_SECONDS * SAMPLE_RATE)
+    if len(bounds) > 1:
+        print(f"[whisper] chunked: {len(pcm) / SAMPLE_RATE:.0f}s in {len(bounds)} chunks")
+
+    semaphore = asyncio.Semaphore(WHISPER_CONCURRENCY)
+    uploaded = []
+
+    async def run(i: int, start: int, end: int) -> list[dict]:
+        lo, hi = max(0, start - overlap), min(len(pcm), end + overlap)
+        data, ext = await loop.run_in_executor(None, encode_speech, pcm[lo:hi])
+        uploaded.append(len(data))
+        async with semaphore:
+            segments = await transcribe_file_segments(openai_client, (f"chunk_{i}.{ext}", data))
+        offset = lo / SAMPLE_RATE
+        span_start, span_end = start / SAMPLE_RATE, end / SAMPLE_RATE
+        kept = []
+        for seg in segments:
+            seg_start, seg_end = seg["start"] + offset, seg["end"] + offset
+            # Only this chunk's own span — drops what the neighbours also heard
+            if span_start <= (seg_start + seg_end) / 2 < span_end:
+                kept.append({"start": seg_start, "end": seg_end, "text": seg["text"].strip()})
+        return kept
+
+    results = await asyncio.gather(*(run(i, s, e) for i, (s, e) in enumerate(bounds)))
+    if source_bytes:
+        log_bytes_saved(f"whisper upload ({len(bounds)} chunk{'s' if len(bounds) > 1 else ''})", source_bytes, sum(uploaded))
+    return [seg for chunk in results for seg in chunk if seg["text"]]
+
+
+class OffsetMap:
+    """Maps times in silence-trimmed audio back to the original timeline."""
+
+    __slots__ = ("starts", "spans", "removed")
+
+    def __init__(self, spans=(), removed=0.0):
+        # spans: (trimmed_start, original_start) seconds for each kept piece, in order
+        self.spans = list(spans) or [(0.0, 0.0)]
+        self.starts = [t for t, _ in self.spans]
+        self.removed = removed
+
+    def to_original(self, t: float) -> float:
+        i = max(0, bisect.bisect_right(self.starts, t) - 1)
+        trimmed_start, original_start = self.spans[i]
+        return original_start + (t - trimmed_start)
+
+    def remap(self, segments: list[dict]) -> list[dict]:
+        if not self.removed:
+            return segments
+        return [
+            {**seg, "start": self.to_original(seg["start"]), "end": self.to_original(seg["end"])}
+            for seg in segments
+        ]
+
+
+def detect_speech(pcm) -> list[tuple[int, int]]:
+    """
+    Energy-based VAD: (start, end) sample ranges to keep. A frame is voiced when its
+    level is well above the clip's own noise floor; quiet runs shorter than
+    VAD_MIN_SILENCE_SECONDS are kept so natural pauses survive.
+    """
+    import numpy as np
+
+    frame = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    n = len(pcm) // frame
+    if n < 1:
+        return [(0, len(pcm))]
+    frames = pcm[: n * frame].astype(np.float32).reshape(n, frame)
+    level = 10 * np.log10((frames ** 2).mean(axis=1) + 1e-9)
+    floor, peak = np.percentile(level, 10), np.percentile(level, 95)
+    threshold = max(floor + 0.25 * (peak - floor), 20.0)  # ~-70 dBFS absolute minimum
+    voiced = level > threshold
+
+    min_run = int(VAD_MIN_SILENCE_SECONDS / VAD_FRAME_SECONDS)
+    pad = int(VAD_PAD_SECONDS * SAMPLE_RATE)
+    keep, start, i = [], 0, 0
+    while i < n:
+        if voiced[i]:
+            i += 1
+            continue
+        j = i
+        while j < n and not voiced[j]:
+            j += 1
+        if j - i >= min_run:
+            cut_lo = i * frame + (pad if i > 0 else 0)
+            cut_hi = (j * frame - pad) if j < n else len(pcm)
+            if cut_hi > cut_lo:
+                if cut_lo > start:
+                    keep.append((start, cut_lo))
+                start = cut_hi
+        i = j
+    if start < len(pcm):
+        keep.append((start, len(pcm)))
+    return keep
+
+
+def trim_silence(pcm):
+    """(trimmed pcm, OffsetMap). Returns the input untouched when little would be cut."""
+    import numpy as np
+
+    keep = detect_speech(pcm)
+    kept_samples = sum(e - s for s, e in keep)
+    removed = len(pcm) - kept_samples
+    if not keep:
+        return pcm[:0], OffsetMap(removed=len(pcm) / SAMPLE_RATE)
+    if removed < VAD_MIN_SAVINGS * len(pcm):
+        return pcm, OffsetMap()
+    spans, pos = [], 0
+    for s, e in keep:
+        spans.append((pos / SAMPLE_RATE, s / SAMPLE_RATE))
+        pos += e - s
+    print(f"[vad] trimmed {removed / SAMPLE_RATE:.1f}s of {len(pcm) / SAMPLE_RATE:.1f}s as silence")
+    return np.concatenate([pcm[s:e] for s, e in keep]), OffsetMap(spans, removed / SAMPLE_RATE)
+
+
+async def transcribe_speech(pcm, openai_client: AsyncOpenAI, source_bytes: int = 0) -> list[dict]:
+    """Silence-trim PCM, transcribe it, and map the segments back onto its timeline."""
+    speech, offsets = await asyncio.get_event_loop().run_in_executor(None, trim_silence, pcm)
+    if not len(speech):
+        return []
+    return offsets.remap(await transcribe_pcm(speech, openai_client, source_bytes=source_bytes))
+
+
+def format_timestamped(segments: list[dict]) -> str:
+    """Transcript with [m:ss] markers (original-timeline times)."""
+    lines = []
+    for seg in segments:
+        m, sec = divmod(int(seg["start"]), 60)
+        h, m = divmod(m, 60)
+        stamp = f"{h}:{m:02d}:{sec:02d}" if h else f"{m}:{sec:02d}"
+        lines.append(f"[{stamp}] {seg['text']}")
+    return "\n".join(lines)
+
+
+def segments_to_text(segments: list[dict]) -> str:
+    return " ".join(seg["text"] for seg in segments).strip()
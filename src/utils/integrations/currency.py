@@ -1,59 +1,148 @@
 # Currency conversion integration using ExchangeRate-API
+#
+# Instead of downloading a full rate table for `from_currency` on every conversion,
+# one table for a single base currency is kept in memory and refreshed on a TTL.
+# Any pair is derived locally as a cross rate (to/base ÷ from/base), so conversions
+# normally cost no network call at all. A stale table is still served while a
+# background refresh runs, and concurrent refreshes collapse into one request.
 import os
+import time
+import asyncio
 import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
 
 EXCHANGE_RATE_API_KEY = os.getenv("EXCHANGE_RATE_API_KEY")
+RATES_BASE_CURRENCY = os.getenv("EXCHANGE_RATE_BASE", "USD").upper()
+RATES_TTL = int(os.getenv("EXCHANGE_RATE_TTL", "3600"))  # seconds before a table is considered stale
+RATES_MAX_STALE = 24 * 3600                              # past this, block on a refresh instead of serving stale
 
-async def convert_currency(amount, from_currency, to_currency):
-    if not EXCHANGE_RATE_API_KEY or EXCHANGE_RATE_API_KEY == "your_exchangerate_api_key_here":
+_rates: dict[str, float] = {}
+_rates_fetched_at = 0.0
+_refresh_task: asyncio.Task | None = None
+_http_client: httpx.AsyncClient | None = None
+
+
+def _has_paid_key():
+    return bool(EXCHANGE_RATE_API_KEY) and EXCHANGE_RATE_API_KEY != "your_exchangerate_api_key_here"
+
+
+def _rates_url(base):
+    if not _has_paid_key():
         # Use free tier endpoint if no API key
-        url = f"https://api.exchangerate-api.com/v4/latest/{from_currency.upper()}"
+        return f"https://api.exchangerate-api.com/v4/latest/{base}"
+    # Use paid tier endpoint with API key
+    return f"https://v6.exchangerate-api.com/v6/{EXCHANGE_RATE_API_KEY}/latest/{base}"
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=10.0)
+    return _http_client
+
+
+async def _fetch_rates_table():
+    # Download the base table once and swap it in atomically
+    global _rates, _rates_fetched_at
+    response = await _get_http_client().get(_rates_url(RATES_BASE_CURRENCY))
+    response.raise_for_status()
+    data = response.json()
+
+    if _has_paid_key():
+        # Paid API response format
+        if data.get('result') != 'success':
+            raise ValueError(f"API Error: {data.get('error-type', 'Unknown error')}")
+        rates = data.get('conversion_rates', {})
     else:
-        # Use paid tier endpoint with API key
-        url = f"https://v6.exchangerate-api.com/v6/{EXCHANGE_RATE_API_KEY}/latest/{from_currency.upper()}"
-    
+        # Free API response format
+        if 'rates' not in data:
+            raise ValueError("Invalid currency code or API response")
+        rates = data['rates']
+
+    rates = {code.upper(): float(rate) for code, rate in rates.items() if rate}
+    rates[RATES_BASE_CURRENCY] = 1.0
+    _rates = rates
+    _rates_fetched_at = time.monotonic()
+    print(f"[currency] refreshed {len(rates)} rates (base {RATES_BASE_CURRENCY})")
+    return rates
+
+
+def _refresh_rates():
+    # Single-flight refresh: every caller during a refresh shares the same task
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_fetch_rates_table())
+        _refresh_task.add_done_callback(_log_refresh_failure)
+    return _refresh_task
+
+
+def _log_refresh_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[currency] rate refresh failed: {task.exception()}")
+
+
+async def get_rates():
+    # Return the current base table, refreshing it on the TTL schedule
+    age = time.monotonic() - _rates_fetched_at
+    if _rates and age < RATES_TTL:
+        return _rates
+    if _rates and age < RATES_MAX_STALE:
+        # Serve the stale table now and refresh in the background
+        _refresh_rates()
+        return _rates
+    return await asyncio.shield(_refresh_rates())
+
+
+async def run_rates_refresher():
+    # Keep the table warm on the TTL schedule so conversions never wait on the network.
+    # Started once from the bot's setup_hook; failures just leave the previous table.
+    while True:
+        try:
+            await asyncio.shield(_refresh_rates())
+        except Exception:
+            pass  # already logged by _log_refresh_failure
+        await asyncio.sleep(RATES_TTL)
+
+
+def get_cross_rate(rates, from_currency, to_currency):
+    # Derive from->to locally from a single base table
+    return rates[to_currency] / rates[from_currency]
+
+
+async def convert_currency(amount, from_currency, to_currency):
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-        
-        # Check if the response is successful
-        if EXCHANGE_RATE_API_KEY and EXCHANGE_RATE_API_KEY != "your_exchangerate_api_key_here":
-            # Paid API response format
-            if data.get('result') != 'success':
-                return {"error": f"API Error: {data.get('error-type', 'Unknown error')}"}
-            rates = data.get('conversion_rates', {})
-        else:
-            # Free API response format
-            if 'rates' not in data:
-                return {"error": "Invalid currency code or API response"}
-            rates = data['rates']
-        
+        rates = await get_rates()
+
+        from_currency_upper = from_currency.upper()
         to_currency_upper = to_currency.upper()
-        
+
+        if from_currency_upper not in rates:
+            return {"error": f"Currency '{from_currency}' not found"}
         if to_currency_upper not in rates:
             return {"error": f"Currency '{to_currency}' not found"}
-        
-        exchange_rate = rates[to_currency_upper]
-        converted_amount = round(amount * exchange_rate, 2)
-        
+
+        # Convert with the full-precision rate; only the displayed rate is rounded
+        rate = get_cross_rate(rates, from_currency_upper, to_currency_upper)
+        exchange_rate = round(rate, 6)
+        converted_amount = round(amount * rate, 2)
+
         return {
             "original_amount": amount,
             "converted_amount": converted_amount,
-            "from_currency": from_currency.upper(),
+            "from_currency": from_currency_upper,
             "to_currency": to_currency_upper,
             "exchange_rate": exchange_rate,
             "success": True
         }
-        
+
     except httpx.RequestError as e:
         return {"error": f"Network error: {str(e)}"}
     except httpx.HTTPStatusError as e:
         return {"error": f"HTTP error: {e.response.status_code}"}
+    except ValueError as e:
+        return {"error": str(e)}
     except KeyError as e:
         return {"error": f"Missing key in API response: {str(e)}"}
     except Exception as e:
@@ -0,0 +1,230 @@
+# Streaming media mode for TLDR (opt-in: TLDR_STREAMING=1).
+#
+# The temp-file path downloads the whole video to disk, reopens it for frames, writes
+# the extracted audio to a second file and reads that back for Whisper. Here the
+# source bytes (a link's direct media URL from the yt-dlp probe, or a Discord
+# attachment) flow through a bounded in-memory pipe into a single PyAV demux pass:
+#   - audio packets are decoded and resampled straight to 16 kHz mono PCM, which the
+#     silence trimmer / chunker in audio.py encodes and uploads from memory;
+#   - video frames sampled from the same pass feed the distinct-frame picker in video.py;
+#   - the bytes are hashed on the way through, giving the attachment cache key.
+# The source is read once, nothing touches the disk and there's nothing to clean up
+# after a crash. Media that can't be demuxed from a non-seekable stream (MP4 with its
+# index at the end, HLS/DASH) raises StreamUnavailable and callers use temp files.
+import os
+import time
+import queue
+import asyncio
+import hashlib
+import threading
+
+TLDR_STREAMING = os.getenv("TLDR_STREAMING", "0") == "1"
+PIPE_CHUNK_BYTES = 256 * 1024
+PIPE_MAX_CHUNKS = 16                # ≤ 4 MB buffered between the network and the demuxer
+STREAM_TIMEOUT = 30.0               # seconds without progress before giving up
+
+
+class StreamUnavailable(Exception):
+    """This source can't be processed as a stream — use the temp-file path."""
+
+
+class BoundedPipe:
+    """
+    Thread-safe byte pipe with a file-like read end (what PyAV reads from). The
+    writer blocks while PIPE_MAX_CHUNKS chunks are waiting, so memory stays bounded
+    however large the source is.
+    """
+
+    def __init__(self, max_chunks: int = PIPE_MAX_CHUNKS):
+        self._chunks = queue.Queue(max_chunks)
+        self._buffer = b""
+        self._eof = False
+        self._closed = threading.Event()
+        self.error = None
+        self.bytes_written = 0
+        self.digest = hashlib.sha256()
+
+    # -- writer side (producer thread) --
+    def write(self, data: bytes) -> None:
+        self.digest.update(data)
+        self.bytes_written += len(data)
+        while not self._closed.is_set():
+            try:
+                self._chunks.put(data, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise StreamUnavailable("reader closed the pipe")
+
+    def finish(self, error: Exception | None = None) -> None:
+        self.error = error
+        while not self._closed.is_set():
+            try:
+                self._chunks.put(None, timeout=0.5)  # EOF marker
+                return
+            except queue.Full:
+                continue
+
+    # -- reader side (demux thread) --
+    def _next_chunk(self) -> bytes | None:
+        # Short polls so a close() (the TLDR was cancelled) stops the demuxer right away
+        deadline = time.monotonic() + STREAM_TIMEOUT
+        while True:
+            if self._closed.is_set():
+                self._eof = True
+                raise StreamUnavailable("pipe closed")
+            try:
+                return self._chunks.get(timeout=0.5)
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise StreamUnavailable("source stalled") from None
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._next_chunk()
+            if chunk is None:
+                self._eof = True
+                if self.error is not None:
+                    raise StreamUnavailable(f"source failed: {self.error}")
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def drain(self) -> None:
+        # Read to EOF so the digest covers the whole source
+        while self.read(PIPE_CHUNK_BYTES):
+            pass
+
+    def close(self) -> None:
+        # Stops both ends: the writer's next write() and the reader's next poll raise
+        self._closed.set()
+
+
+class StreamedMedia:
+    __slots__ = ("pcm", "frames", "duration", "sha256", "source_bytes")
+
+    def __init__(self, pcm, frames, duration, sha256, source_bytes):
+        self.pcm = pcm
+        self.frames = frames
+        self.duration = duration
+        self.sha256 = sha256
+        self.source_bytes = source_bytes
+
+
+def _produce(pipe: BoundedPipe, url: str, headers: dict, max_bytes: int) -> None:
+    try:
+        import httpx
+        with httpx.stream("GET", url, headers=headers, follow_redirects=True, timeout=STREAM_TIMEOUT) as resp:
+            resp.raise_for_status()
+            for chunk in resp.iter_bytes(PIPE_CHUNK_BYTES):
+                if pipe.bytes_written + len(chunk) > max_bytes:
+                    raise StreamUnavailable(f"source exceeds {max_bytes // (1024 * 1024)} MB")
+                pipe.write(chunk)
+        pipe.finish()
+    except Exception as e:
+        pipe.finish(e)
+
+
+def _demux(pipe: BoundedPipe, duration: float | None, frames_max_duration: float | None):
+    """
+    One pass over the container: (16 kHz mono int16 PCM, frame candidates, duration).
+    Frames are only collected when the (known or container-reported) duration is
+    within frames_max_duration. Media past MAX_DURATION_SECONDS raises
+    StreamUnavailable — checked up front and against the decoded sample count, since
+    max_bytes only caps the compressed input.
+    """
+    import av
+    import numpy as np
+    from utils.integrations.audio import SAMPLE_RATE
+    from utils.integrations.video import frame_sampling_window, frame_candidate, MAX_DURATION_SECONDS
+
+    try:
+        container = av.open(pipe, mode="r")
+    except Exception as e:
+        raise StreamUnavailable(f"can't demux from a stream: {e}") from None
+    with container:
+        if not container.streams.audio:
+            raise StreamUnavailable("no audio track")
+        audio = container.streams.audio[0]
+        total = duration or (container.duration / av.time_base if container.duration else 0)
+        if total > MAX_DURATION_SECONDS:
+            raise StreamUnavailable(f"media is {total:.0f}s, over the {MAX_DURATION_SECONDS}s cap")
+        max_samples = MAX_DURATION_SECONDS * SAMPLE_RATE
+        video = None
+        if frames_max_duration is not None and container.streams.video and total and total <= frames_max_duration:
+            video = container.streams.video[0]
+            video.thread_type = "AUTO"
+            # No second pass is possible on a stream, so rather than keyframes only (too
+            # few on long-GOP video) decode reference frames and keep a sparse subset
+            video.codec_context.skip_frame = "NONREF"
+        start, end, interval = frame_sampling_window(total)
+
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        parts, candidates, next_time, decoded = [], [], start, 0
+        streams = [audio] + ([video] if video else [])
+        for packet in container.demux(*streams):
+            if packet.stream is audio:
+                for frame in packet.decode():
+                    for out in resampler.resample(frame):
+                        parts.append(out.to_ndarray().reshape(-1))
+                        decoded += len(parts[-1])
+                if decoded > max_samples:
+                    raise StreamUnavailable(f"decoded audio passed the {MAX_DURATION_SECONDS}s cap")
+            else:
+                for frame in packet.decode():
+                    t = frame.time
+                    if t is None or t < next_time or t > end:
+                        continue
+                    candidates.append((t, frame_candidate(frame)))
+                    next_time = t + interval
+        for out in resampler.resample(None):  # flush
+            parts.append(out.to_ndarray().reshape(-1))
+
+    pcm = np.concatenate(parts).astype(np.int16, copy=False) if parts else np.zeros(0, dtype=np.int16)
+    return pcm, candidates, total or len(pcm) / SAMPLE_RATE
+
+
+async def stream_media(
+    url: str,
+    headers: dict | None = None,
+    duration: float | None = None,
+    frames_max_duration: float | None = None,
+    max_bytes: int = 200 * 1024 * 1024,
+) -> StreamedMedia:
+    """
+    Stream `url` through a bounded pipe into one demux pass. Raises StreamUnavailable
+    (network error, unstreamable container, no audio…) so the caller can fall back.
+    """
+    from utils.integrations.video import pick_distinct_frames, frame_budget
+
+    pipe = BoundedPipe()
+    loop = asyncio.get_event_loop()
+
+    def consume():
+        try:
+            result = _demux(pipe, duration, frames_max_duration)
+            pipe.drain()
+            return result
+        finally:
+            pipe.close()  # unblocks the producer if the demuxer stopped early
+
+    producer = loop.run_in_executor(None, _produce, pipe, url, headers or {}, max_bytes)
+    try:
+        pcm, candidates, total = await loop.run_in_executor(None, consume)
+        await producer
+    except StreamUnavailable:
+        raise
+    except Exception as e:
+        raise StreamUnavailable(str(e)) from None
+    finally:
+        pipe.close()  # also on cancellation: both worker threads stop within a poll
+
+    frames = []
+    if candidates:
+        frames = await loop.run_in_executor(None, pick_distinct_frames, candidates, frame_budget(total))
+    print(f"[stream] demuxed {pipe.bytes_written} bytes in one pass: {total:.0f}s audio, {len(frames)} frames")
+    return StreamedMedia(pcm, frames, total, pipe.digest.hexdigest(), pipe.bytes_written)
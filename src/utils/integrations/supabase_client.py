@@ -162,3 +162,60 @@ async def get_pending_reminders() -> list[dict]:
 async def delete_reminder(reminder_id: str) -> None:
     client = await get_client()
     await client.table("scheduled_reminders").delete().eq("id", reminder_id).execute()
+
+
+# --- tldr_media / tldr_summaries ---
+# Content-addressed TLDR cache (see utils/integrations/tldr_cache.py). The expensive,
+# mode-independent work (transcript, metadata, sampled frames) is stored once per
+# media key; summaries are stored per (media key, mode).
+# Table DDL (run once in Supabase):
+#   create table tldr_media (
+#     media_key         text primary key,
+#     transcript        text        not null,
+#     timed_transcript  text,
+#     transcript_source text,
+#     metadata          jsonb       not null default '{}',
+#     frames            jsonb       not null default '[]',
+#     created_at        timestamptz default now()
+#   );
+#   create table tldr_summaries (
+#     media_key  text not null references tldr_media (media_key) on delete cascade,
+#     mode       text not null,
+#     summary    text not null,
+#     created_at timestamptz default now(),
+#     primary key (media_key, mode)
+#   );
+
+async def get_tldr_media(media_key: str) -> dict | None:
+    client = await get_client()
+    result = (
+        await client.table("tldr_media")
+        .select("*")
+        .eq("media_key", media_key)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+async def upsert_tldr_media(rows: list[dict]) -> None:
+    client = await get_client()
+    await client.table("tldr_media").upsert(rows, on_conflict="media_key").execute()
+
+
+async def get_tldr_summary(media_key: str, mode: str) -> str | None:
+    client = await get_client()
+    result = (
+        await client.table("tldr_summaries")
+        .select("summary")
+        .eq("media_key", media_key)
+        .eq("mode", mode)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0]["summary"] if result.data else None
+
+
+async def upsert_tldr_summaries(rows: list[dict]) -> None:
+    client = await get_client()
+    await client.table("tldr_summaries").upsert(rows, on_conflict="media_key,mode").execute()
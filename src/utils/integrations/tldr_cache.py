@@ -0,0 +1,158 @@
+# Content-addressed TLDR cache.
+#
+# The expensive part of a TLDR (download, transcription, frame sampling) doesn't
+# depend on the summary mode or on which channel asked, so it is cached per *media*:
+#   - links are keyed by yt-dlp extractor + video id ("TikTok:7301…", "Youtube:dQw4…"),
+#     worked out from the URL without any network request, so fixupx/vxreddit/share
+#     links to the same post collide; unknown sites fall back to a hash of the URL;
+#   - attachments are keyed by a sha256 of their bytes.
+# Transcript, metadata and frames are stored once per key; summaries are stored per
+# (key, mode), so a repeat costs nothing and a new mode costs one summary call.
+# A small in-process LRU sits in front of Supabase (tldr_media / tldr_summaries, see
+# supabase_client.py); when Supabase isn't configured or errors, only the LRU is used.
+import os
+import re
+import asyncio
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.core.ttl_cache import TTLCache
+from utils.integrations import supabase_client as db
+from utils.integrations.video import normalize_url, extract_youtube_id
+
+TLDR_CACHE_ENABLED = os.getenv("TLDR_CACHE", "1") != "0"
+TLDR_CACHE_TTL = 6 * 3600           # in-process tier; Supabase rows don't expire
+_PERSISTENT = bool(os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"))
+
+_media = TTLCache(maxsize=64, ttl=TLDR_CACHE_TTL)         # key -> media dict
+_summaries = TTLCache(maxsize=256, ttl=TLDR_CACHE_TTL)    # (key, mode) -> summary
+_pending_writes: set[asyncio.Task] = set()
+_write_lock = asyncio.Lock()  # FIFO, so a summary row never lands before its media row
+
+# Query parameters that only track the share, never select the media
+_TRACKING_PARAM_RE = re.compile(r'^(utm_\w+|si|igsh|igshid|feature|share_id|is_from_webapp|sender_device|ref|s|t)$', re.IGNORECASE)
+_extractor_classes = None
+
+
+def _extractors():
+    global _extractor_classes
+    if _extractor_classes is None:
+        from yt_dlp.extractor import gen_extractor_classes
+        _extractor_classes = [ie for ie in gen_extractor_classes() if ie.ie_key() != "Generic"]
+    return _extractor_classes
+
+
+def _canonical_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAM_RE.match(k)]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower().removeprefix("www."),
+                       parts.path.rstrip("/"), urlencode(sorted(query)), ""))
+
+
+def media_key_for_url(url: str) -> str:
+    """Cache key for a link. Blocking on first use (loads yt-dlp's extractor list)."""
+    url = normalize_url(url)
+    video_id = extract_youtube_id(url)
+    if video_id:
+        return f"Youtube:{video_id}"
+    try:
+        for ie in _extractors():
+            if ie.suitable(url):
+                temp_id = ie.get_temp_id(url)
+                if temp_id:
+                    return f"{ie.ie_key()}:{temp_id}"
+                break
+    except Exception as e:
+        print(f"[tldr cache] extractor lookup failed for {url}: {e}")
+    return "url:" + hashlib.sha256(_canonical_url(url).encode("utf-8")).hexdigest()
+
+
+def media_key_for_file(path: str) -> str:
+    """Cache key for an uploaded file: sha256 of its bytes. Blocking."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return media_key_for_digest(digest.hexdigest())
+
+
+def media_key_for_digest(sha256_hex: str) -> str:
+    """Cache key for uploaded bytes hashed elsewhere (e.g. while streaming them)."""
+    return "sha256:" + sha256_hex
+
+
+def _write_behind(coro) -> None:
+    # Persist without holding up the reply; failures only cost a future cache miss
+    async def run():
+        try:
+            async with _write_lock:
+                await coro
+        except Exception as e:
+            print(f"[tldr cache] persist failed: {e}")
+
+    task = asyncio.create_task(run())
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+
+
+async def get_media(key: str) -> dict | None:
+    """{"transcript", "timed_transcript", "transcript_source", "metadata", "frames"} or None."""
+    if not TLDR_CACHE_ENABLED:
+        return None
+    media = _media.get(key)
+    if media is None and _PERSISTENT:
+        try:
+            row = await db.get_tldr_media(key)
+        except Exception as e:
+            print(f"[tldr cache] lookup failed for {key}: {e}")
+            row = None
+        if row:
+            media = {
+                "transcript":        row["transcript"],
+                "timed_transcript":  row.get("timed_transcript"),
+                "transcript_source": row.get("transcript_source") or "Whisper",
+                "metadata":          row.get("metadata") or {},
+                "frames":            row.get("frames") or [],
+            }
+            _media.set(key, media)
+    if media is not None:
+        print(f"[tldr cache] media hit for {key}")
+    return media
+
+
+def put_media(keys, media: dict) -> None:
+    if not TLDR_CACHE_ENABLED or not media.get("transcript"):
+        return
+    keys = [k for k in dict.fromkeys(keys) if k]
+    for key in keys:
+        _media.set(key, media)
+    if _PERSISTENT and keys:
+        _write_behind(db.upsert_tldr_media([{"media_key": key, **media} for key in keys]))
+
+
+async def get_summary(key: str, mode: str) -> str | None:
+    if not TLDR_CACHE_ENABLED:
+        return None
+    summary = _summaries.get((key, mode))
+    if summary is None and _PERSISTENT:
+        try:
+            summary = await db.get_tldr_summary(key, mode)
+        except Exception as e:
+            print(f"[tldr cache] summary lookup failed for {key}: {e}")
+        if summary:
+            _summaries.set((key, mode), summary)
+    if summary:
+        print(f"[tldr cache] {mode} summary hit for {key}")
+    return summary or None
+
+
+def put_summary(keys, mode: str, summary: str) -> None:
+    if not TLDR_CACHE_ENABLED or not summary:
+        return
+    keys = [k for k in dict.fromkeys(keys) if k]
+    for key in keys:
+        _summaries.set((key, mode), summary)
+    if _PERSISTENT and keys:
+        _write_behind(db.upsert_tldr_summaries(
+            [{"media_key": key, "mode": mode, "summary": summary} for key in keys]
+        ))
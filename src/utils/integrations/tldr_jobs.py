@@ -0,0 +1,74 @@
+# Single-flight TLDR jobs.
+#
+# When several people TLDR the same link (or the same uploaded file) at once, only one
+# download/transcription runs. The job is keyed by the media's cache key (see
+# tldr_cache.py), so fixupx/vx/share-link variants of one post also share a job.
+# Every requester keeps its own progress message: the job's progress steps are
+# fanned out to all attached on_step callbacks (a late joiner first gets the current
+# step), and the result or error is delivered to all of them.
+#
+# Requesters are cancelled individually (inflight.py cancels a requester when its
+# trigger message is edited/deleted): that only detaches it. The job itself is
+# cancelled once nobody is waiting for it any more.
+import asyncio
+
+
+class _Job:
+    __slots__ = ("key", "task", "listeners", "last_step")
+
+    def __init__(self, key):
+        self.key = key
+        self.task = None
+        self.listeners = []
+        self.last_step = None
+
+    async def broadcast(self, text: str) -> None:
+        self.last_step = text
+        results = await asyncio.gather(*(step(text) for step in list(self.listeners)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                # A deleted progress message mustn't fail the job for everyone else
+                print(f"[tldr jobs] progress update failed for {self.key}: {result}")
+
+
+_jobs: dict[str, _Job] = {}
+
+
+def _forget(job: _Job) -> None:
+    if _jobs.get(job.key) is job:
+        del _jobs[job.key]
+
+
+async def run_shared(key: str, make_job, on_step):
+    """
+    Run make_job(step) once per key and return its result to every concurrent caller.
+    `step` is an async callable(str) that updates all attached callers' progress.
+    """
+    job = _jobs.get(key)
+    if job is None:
+        job = _jobs[key] = _Job(key)
+        job.task = asyncio.create_task(make_job(job.broadcast))
+        job.task.add_done_callback(lambda _task, job=job: _forget(job))
+    else:
+        print(f"[tldr jobs] attaching to in-flight job {key} ({len(job.listeners)} already waiting)")
+        if job.last_step:
+            try:
+                await on_step(job.last_step)
+            except Exception:
+                pass
+
+    job.listeners.append(on_step)
+    try:
+        return await asyncio.shield(job.task)
+    except asyncio.CancelledError:
+        if job.task.done():
+            raise
+        job.listeners.remove(on_step)
+        if not job.listeners:
+            print(f"[tldr jobs] no requesters left, cancelling {key}")
+            _forget(job)  # a new requester starts fresh instead of joining a dying job
+            job.task.cancel()
+        raise
+    finally:
+        if on_step in job.listeners:
+            job.listeners.remove(on_step)
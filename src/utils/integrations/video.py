@@ -50,6 +50,96 @@ def normalize_url(url: str) -> str:
     return url
 
 
+_YOUTUBE_ID_RE = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:[^#\s]*&)?v=|shorts/|embed/|live/)|youtu\.be/)([A-Za-z0-9_-]{11})',
+    re.IGNORECASE,
+)
+
+
+def extract_youtube_id(url: str) -> str | None:
+    """Return the 11-character YouTube video id from any YouTube URL form, or None."""
+    m = _YOUTUBE_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+def _fetch_youtube_captions_sync(video_id: str) -> tuple[str, float, str] | None:
+    """
+    Fetch an existing YouTube transcript (no download, no Whisper).
+    Preference: manual English → auto-generated English → manual any language →
+    auto-generated any language. Returns (text, duration_seconds, label) or None.
+    """
+    from youtube_transcript_api import YouTubeTranscriptApi, CouldNotRetrieveTranscript
+
+    try:
+        # Not thread-safe per instance (shared requests.Session) — one per call
+        available = list(YouTubeTranscriptApi().list(video_id))
+        if not available:
+            return None
+        best = min(available, key=lambda t: (not t.language_code.lower().startswith("en"), t.is_generated))
+        fetched = best.fetch()
+    except CouldNotRetrieveTranscript as e:
+        print(f"[youtube] no captions for {video_id}: {type(e).__name__}")
+        return None
+
+    snippets = [s for s in fetched if s.text and s.text.strip()]
+    if not snippets:
+        return None
+    text = " ".join(s.text.replace("\n", " ").strip() for s in snippets)
+    duration = snippets[-1].start + snippets[-1].duration
+    label = f"{best.language} ({'auto-generated' if best.is_generated else 'manual'})"
+    print(f"[youtube] captions for {video_id}: {label}, {len(snippets)} snippets, {len(text)} chars")
+    return text, duration, label
+
+
+async def _fetch_youtube_oembed(url: str) -> dict:
+    # Title/channel/thumbnail without touching yt-dlp; {} on any failure
+    import httpx
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            resp = await client.get("https://www.youtube.com/oembed", params={"url": url, "format": "json"})
+            if resp.status_code == 200:
+                return resp.json()
+    except Exception as e:
+        print(f"[youtube] oembed failed: {e}")
+    return {}
+
+
+async def fetch_youtube_transcript(url: str) -> tuple[str, dict] | None:
+    """
+    Caption-first transcript for a YouTube URL. Returns (transcript, metadata) in the
+    same shape download_audio's metadata uses, or None when the video has no captions
+    (callers fall back to yt-dlp + Whisper). Raises ValueError past MAX_DURATION_SECONDS,
+    like the downloaders.
+    """
+    video_id = extract_youtube_id(url)
+    if not video_id:
+        return None
+    loop = asyncio.get_event_loop()
+    try:
+        captions, oembed = await asyncio.gather(
+            loop.run_in_executor(None, _fetch_youtube_captions_sync, video_id),
+            _fetch_youtube_oembed(url),
+        )
+    except Exception as e:
+        print(f"[youtube] caption fetch failed for {video_id}: {e}")
+        return None
+    if not captions:
+        return None
+    text, duration, label = captions
+    if duration > MAX_DURATION_SECONDS:
+        # Same cap as the download path — keeps the map-reduce summary bounded
+        raise ValueError(f"Video is too long — max {MAX_DURATION_SECONDS // 60} minutes.")
+    metadata = {
+        "title":       oembed.get("title", "Unknown Title"),
+        "duration":    int(duration),
+        "thumbnail":   oembed.get("thumbnail_url") or f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+        "uploader":    oembed.get("author_name", ""),
+        "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+        "captions":    label,
+    }
+    return text, metadata
+
+
 def _find_output_file(tmp_dir: str, temp_id: str, prefix: str = "abg_audio") -> str | None:
     for ext in ("m4a", "webm", "mp4", "mp3", "opus", "ogg", "mpeg", "wav"):
         candidate = os.path.join(tmp_dir, f"{prefix}_{temp_id}.{ext}")
@@ -65,6 +155,8 @@ def _extract_metadata(info: dict, fallback_url: str) -> dict:
         "thumbnail":   info.get("thumbnail"),
         "uploader":    info.get("uploader") or info.get("channel", ""),
         "webpage_url": info.get("webpage_url", fallback_url),
+        # Canonical id for the TLDR cache — short links resolve to the same key
+        "media_key":   f"{info['extractor_key']}:{info['id']}" if info.get("extractor_key") and info.get("id") else None,
     }
 
 
@@ -103,12 +195,122 @@ def _translate_ydl_error(msg: str) -> str:
     return f"Could not download video: {msg[:200]}"
 
 
-async def _ydl_download(url: str, ydl_opts: dict) -> dict:
+_MAX_VIDEO_DOWNLOAD_BYTES = 100 * 1024 * 1024  # larger videos are rerouted to audio-only
+_MAX_AUDIO_DOWNLOAD_BYTES = 200 * 1024 * 1024  # long audio is chunked for Whisper
+_WHISPER_AUDIO_EXTS = {"m4a", "webm", "mp3", "mp4", "ogg", "oga", "mpeg", "wav", "flac"}
+
+
+def _estimate_bytes(fmt: dict, duration) -> int | None:
+    """Best-known size of a yt-dlp format: exact, approximate, or bitrate × duration."""
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return int(size)
+    if fmt.get("tbr") and duration:
+        return int(fmt["tbr"] * 1000 / 8 * duration)
+    return None
+
+
+def _has_audio(fmt: dict) -> bool:
+    return fmt.get("acodec") != "none"   # None means "unknown", which may still carry audio
+
+
+def _has_video(fmt: dict) -> bool:
+    return fmt.get("vcodec") != "none"
+
+
+def _select_format(info: dict, kind: str) -> dict | None:
+    """
+    Pick the smallest format that still suits the job from a probed info dict.
+      kind="audio" → smallest Whisper-compatible audio-only stream, else smallest
+                     combined stream
+      kind="video" → smallest combined H.264 (non-HEVC) stream at ≥360p for legible
+                     frames, else the sharpest one below that
+    Returns the chosen format dict, or None to let yt-dlp's own selector decide.
+    """
+    duration = info.get("duration")
+    formats = [f for f in (info.get("formats") or []) if f.get("format_id") and f.get("url")]
+    if not formats:
+        return None
+
+    def size_key(f):
+        est = _estimate_bytes(f, duration)
+        return (est is None, est or 0)
+
+    combined = [
+        f for f in formats
+        if _has_audio(f) and _has_video(f)
+        and not any(c in (f.get("vcodec") or "") for c in ("hev", "hvc", "265"))
+    ]
+    if kind == "audio":
+        audio_only = [
+            f for f in formats
+            if f.get("vcodec") == "none" and _has_audio(f) and (f.get("ext") or "") in _WHISPER_AUDIO_EXTS
+        ]
+        pool = audio_only or combined
+        return min(pool, key=size_key) if pool else None
+
+    avc = [f for f in combined if (f.get("vcodec") or "").startswith("avc")] or combined
+    if not avc:
+        return None
+    legible = [f for f in avc if (f.get("height") or 0) >= 360]
+    if legible:
+        return min(legible, key=size_key)
+    return max(avc, key=lambda f: f.get("height") or 0)
+
+
+def _check_probe(info: dict, fmt: dict | None, max_bytes: int | None) -> int | None:
+    """Reject overlong/oversized media before any bytes are downloaded.
+    Returns the chosen format's estimated size (None if unknown)."""
+    duration = info.get("duration")
+    if duration and duration > MAX_DURATION_SECONDS:
+        raise ValueError(f"Video is too long — max {MAX_DURATION_SECONDS // 60} minutes.")
+    est = _estimate_bytes(fmt, duration) if fmt else None
+    if est and max_bytes and est > max_bytes:
+        raise ValueError(
+            f"Media is too large (~{est // (1024 * 1024)} MB, max {max_bytes // (1024 * 1024)} MB)."
+        )
+    return est
+
+
+async def _ydl_download(url: str, ydl_opts: dict, kind: str | None = None, max_bytes: int | None = None) -> dict:
+    """
+    Run yt-dlp in an executor. With `kind` ("audio"/"video") the URL is first probed
+    metadata-only: duration and the size of the smallest suitable format are checked
+    before downloading, and that exact format is then downloaded from the same probe
+    (no second extraction). Without `kind`, downloads directly with ydl_opts["format"].
+    """
     import yt_dlp
 
+    if kind:
+        # Duration is checked from the probe instead — yt-dlp's match_filter would make
+        # the probe silently return an unselected info dict
+        ydl_opts = {k: v for k, v in ydl_opts.items() if k != "match_filter"}
+
     def _run():
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            return ydl.extract_info(url, download=True)
+            if not kind:
+                return ydl.extract_info(url, download=True)
+            info = ydl.extract_info(url, download=False)
+            if info.get("_type") == "playlist":
+                # Multi-video posts: take the first entry that actually has media
+                info = next((e for e in info.get("entries") or [] if e and e.get("formats")), None)
+                if info is None:
+                    raise ValueError("No downloadable video found at that link.")
+            fmt = _select_format(info, kind)
+            est = _check_probe(info, fmt, max_bytes)
+            print(
+                f"[yt-dlp probe] {kind}: duration={info.get('duration')} "
+                f"format={fmt.get('format_id') if fmt else ydl_opts.get('format')} est_bytes={est}"
+            )
+        # YoutubeDL compiles its format selector in __init__, so the chosen format needs
+        # a fresh instance. The byte cap always applies: estimates can be wrong.
+        download_opts = dict(ydl_opts)
+        if fmt:
+            download_opts["format"] = fmt["format_id"]
+        if max_bytes:
+            download_opts["max_filesize"] = max_bytes
+        with yt_dlp.YoutubeDL(download_opts) as ydl:
+            return ydl.process_ie_result(info, download=True)
 
     loop = asyncio.get_event_loop()
     try:
@@ -119,16 +321,59 @@ async def _ydl_download(url: str, ydl_opts: dict) -> dict:
         raw = str(e)
         print(f"[yt-dlp error] {raw[:500]}")
         raise ValueError(_translate_ydl_error(raw))
+    except ValueError:
+        raise  # probe rejection, already user-facing
     except Exception as e:
         raw = str(e)
         print(f"[yt-dlp unexpected] {raw[:500]}")
         raise ValueError(f"Unexpected download error: {raw[:200]}")
 
 
+_STREAMABLE_PROTOCOLS = {"http", "https"}
+
+
+async def resolve_media_stream(url: str, kind: str) -> tuple[str, dict, dict, int] | None:
+    """
+    Streaming mode: probe a link (no download) and return (direct media URL, HTTP
+    headers, metadata, byte cap) for the same format download_audio/download_video
+    would pick, or None when it's only served as HLS/DASH fragments — those go
+    through yt-dlp's own downloader and the temp-file path.
+    Raises ValueError for overlong/oversized media, like the downloaders.
+    """
+    import yt_dlp
+
+    max_bytes = _MAX_VIDEO_DOWNLOAD_BYTES if kind == "video" else _MAX_AUDIO_DOWNLOAD_BYTES
+    opts = {k: v for k, v in _build_ydl_opts("", "").items() if k != "match_filter"}
+
+    def _run():
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+            if info.get("_type") == "playlist":
+                info = next((e for e in info.get("entries") or [] if e and e.get("formats")), None)
+                if info is None:
+                    raise ValueError("No downloadable video found at that link.")
+            fmt = _select_format(info, kind)
+            _check_probe(info, fmt, max_bytes)
+            return info, fmt
+
+    loop = asyncio.get_event_loop()
+    try:
+        info, fmt = await loop.run_in_executor(None, _run)
+    except yt_dlp.utils.DownloadError as e:
+        raw = str(e)
+        print(f"[yt-dlp error] {raw[:500]}")
+        raise ValueError(_translate_ydl_error(raw))
+    if not fmt or (fmt.get("protocol") or "https") not in _STREAMABLE_PROTOCOLS:
+        return None
+    print(f"[yt-dlp probe] streaming {kind}: format={fmt.get('format_id')} protocol={fmt.get('protocol')}")
+    return fmt["url"], dict(fmt.get("http_headers") or {}), _extract_metadata(info, url), max_bytes
+
+
 async def download_audio(url: str) -> tuple[str, dict]:
     """
     Download audio-only from a video URL.
-    Prefers Whisper-compatible formats (m4a, webm, mp4) — no ffmpeg required.
+    Probes first and downloads the smallest Whisper-compatible audio stream (m4a,
+    webm, mp3…) — no ffmpeg required. Rejects overlong/oversized media up front.
     Caller must delete the returned temp file in a finally block.
     """
     temp_id  = str(uuid.uuid4())[:10]
@@ -136,7 +381,7 @@ async def download_audio(url: str) -> tuple[str, dict]:
     out_tmpl = os.path.join(tmp_dir, f"abg_audio_{temp_id}.%(ext)s")
     opts     = _build_ydl_opts(out_tmpl, "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio[ext=mp3]/bestaudio[ext=mp4]/bestaudio/best[vcodec^=avc][acodec!=none]/best[vcodec!*=hev][vcodec!*=265][acodec!=none]/best")
 
-    info = await _ydl_download(url, opts)
+    info = await _ydl_download(url, opts, kind="audio", max_bytes=_MAX_AUDIO_DOWNLOAD_BYTES)
     out_path = _find_output_file(tmp_dir, temp_id, "abg_audio")
     if not out_path:
         raise ValueError("Audio download failed — no output file was produced.")
@@ -147,6 +392,9 @@ async def download_video(url: str) -> tuple[str, dict]:
     """
     Download full video as mp4 (for frame extraction + Whisper transcription).
     Used for short-form platforms: TikTok, Instagram, Twitter/X.
+    Probes first and downloads the smallest ≥360p H.264 stream; raises ValueError
+    before downloading if the video is overlong or too large (callers reroute to
+    audio-only).
     Caller must delete the returned temp file in a finally block.
     """
     temp_id  = str(uuid.uuid4())[:10]
@@ -154,30 +402,152 @@ async def download_video(url: str) -> tuple[str, dict]:
     out_tmpl = os.path.join(tmp_dir, f"abg_video_{temp_id}.%(ext)s")
     opts     = _build_ydl_opts(out_tmpl, "best[ext=mp4][vcodec^=avc][acodec!=none]/best[ext=mp4][vcodec!*=hev][vcodec!*=265][acodec!=none]/best[acodec!=none]/best")
 
-    info     = await _ydl_download(url, opts)
+    info     = await _ydl_download(url, opts, kind="video", max_bytes=_MAX_VIDEO_DOWNLOAD_BYTES)
     out_path = _find_output_file(tmp_dir, temp_id, "abg_video")
     if not out_path:
         raise ValueError("Video download failed — no output file was produced.")
     return out_path, _extract_metadata(info, url)
 
 
+_FRAME_MAX_WIDTH = 640
+_FRAME_CANDIDATES = 48              # frames scored per video before picking the distinct ones
+_FRAME_DUPLICATE_DISTANCE = 0.08    # closer than this to an already-picked frame = same shot
+
+
 def extract_frames(video_path: str, duration: int) -> list[str]:
     """
-    Extract evenly-spaced frames from a video using OpenCV.
-    Returns base64-encoded JPEG strings, or [] if cv2 is unavailable or fails.
+    Pick up to N visually distinct frames from a video for vision context.
+    Returns base64-encoded JPEG strings, or [] if no decoder is available or it fails.
 
-    Frame count by duration:
+    Frame budget by duration:
       ≤ 30 sec  → 4 frames
       30–90 sec → 6 frames
       90–180 sec → 8 frames
+    Near-duplicate shots are dropped, so a static video yields fewer frames.
     Skips first/last second to avoid intro/outro cards.
     """
+    n_frames = frame_budget(duration)
     try:
-        import cv2
+        return _extract_frames_av(video_path, duration, n_frames)
     except ImportError:
+        pass
+    except Exception as e:
+        print(f"[frames] PyAV sampler failed ({e}), falling back to OpenCV seeking")
+    return _extract_frames_cv2(video_path, n_frames)
+
+
+def frame_budget(duration) -> int:
+    return 4 if (duration or 0) <= 30 else (6 if duration <= 90 else 8)
+
+
+def frame_sampling_window(duration) -> tuple[float, float, float]:
+    """(start, end, interval) seconds for candidate frames; skips the first/last second."""
+    start, end = (1.0, duration - 1.0) if duration > 2 else (0.0, duration)
+    interval = max(0.5, (end - start) / _FRAME_CANDIDATES) if duration else 0.5
+    return start, end, interval
+
+
+def frame_candidate(frame):
+    # Decoded PyAV frame → downscaled BGR ndarray, ready for scoring and JPEG encoding
+    width = min(_FRAME_MAX_WIDTH, frame.width)
+    height = max(2, int(frame.height * width / frame.width) // 2 * 2)
+    return frame.to_ndarray(format="bgr24", width=width, height=height)
+
+
+def _collect_frame_candidates(video_path: str, duration: int, keyframes_only: bool) -> list:
+    """
+    One sequential decode pass → [(time, downscaled BGR ndarray)], at most about
+    _FRAME_CANDIDATES frames evenly spread over the video. With keyframes_only the
+    decoder skips every non-key frame, which is far cheaper than seeking per sample.
+    """
+    import av
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        if keyframes_only:
+            stream.codec_context.skip_frame = "NONKEY"
+        total = duration or (container.duration / av.time_base if container.duration else 0)
+        start, end, interval = frame_sampling_window(total)
+
+        candidates, next_time = [], start
+        for frame in container.decode(stream):
+            t = frame.time
+            if t is None or t < next_time:
+                continue
+            if total and t > end:
+                break
+            candidates.append((t, frame_candidate(frame)))
+            next_time = t + interval
+        return candidates
+
+
+def _frame_signature(img):
+    import cv2
+    import numpy as np
+
+    small = cv2.resize(img, (32, 18), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, [8, 4], [0, 180, 0, 256]).flatten()
+    hist /= hist.sum() or 1.0
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32).flatten() / 255.0
+    return hist, gray
+
+
+def _frame_distance(a, b) -> float:
+    # 0 (identical) … 1: half colour content (histogram), half layout (tiny grayscale)
+    import numpy as np
+
+    return 0.5 * float(np.abs(a[0] - b[0]).sum()) / 2 + 0.5 * float(np.abs(a[1] - b[1]).mean())
+
+
+def _extract_frames_av(video_path: str, duration: int, n_frames: int) -> list[str]:
+    """
+    Scene-aware sampler: decode keyframes (or a sparse low-res pass when the video
+    has too few keyframes), then keep the most distinct frames.
+    """
+    candidates = _collect_frame_candidates(video_path, duration, keyframes_only=True)
+    if len(candidates) < n_frames * 2:
+        # Long GOP (e.g. one keyframe every 10 s): decode everything, keep a sparse subset
+        candidates = _collect_frame_candidates(video_path, duration, keyframes_only=False)
+    return pick_distinct_frames(candidates, n_frames)
+
+
+def pick_distinct_frames(candidates: list, n_frames: int) -> list[str]:
+    """
+    Greedily pick the candidates [(time, BGR ndarray)] that differ most from
+    everything already picked — one per distinct shot, up to n_frames — and return
+    them in time order as base64 JPEGs.
+    """
+    import cv2
+    import numpy as np
+
+    if not candidates:
         return []
+    signatures = [_frame_signature(img) for _, img in candidates]
+    chosen = [0]
+    nearest = np.array([_frame_distance(sig, signatures[0]) for sig in signatures])
+    while len(chosen) < n_frames:
+        best = int(nearest.argmax())
+        if nearest[best] < _FRAME_DUPLICATE_DISTANCE:
+            break  # everything left is a near-duplicate of a picked frame
+        chosen.append(best)
+        nearest = np.minimum(nearest, [_frame_distance(sig, signatures[best]) for sig in signatures])
+
+    frames_b64 = []
+    for i in sorted(chosen):
+        _, buf = cv2.imencode(".jpg", candidates[i][1], [cv2.IMWRITE_JPEG_QUALITY, 75])
+        frames_b64.append(base64.b64encode(buf).decode("utf-8"))
+    print(f"[frames] picked {len(frames_b64)}/{n_frames} distinct frames from {len(candidates)} candidates")
+    return frames_b64
+
 
-    n_frames = 4 if duration <= 30 else (6 if duration <= 90 else 8)
+def _extract_frames_cv2(video_path: str, n_frames: int) -> list[str]:
+    """Fallback sampler: evenly spaced frames via OpenCV seeking."""
+    try:
+        import cv2
+    except ImportError:
+        return []
 
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
@@ -329,42 +699,109 @@ async def download_attachment(url: str, filename: str) -> str:
     return out_path
 
 
-_WHISPER_MAX_BYTES = 25 * 1024 * 1024  # Whisper API hard limit
+_WHISPER_MAX_BYTES = 25 * 1024 * 1024  # Whisper API hard limit (per request)
+
+
+# Source audio codec → (container format, extension) Whisper accepts as a straight copy
+_REMUX_TARGETS = {
+    "aac":    ("mp4", "m4a"),
+    "mp3":    ("mp3", "mp3"),
+    "opus":   ("ogg", "ogg"),
+    "vorbis": ("ogg", "ogg"),
+    "flac":   ("flac", "flac"),
+}
+
+
+def _remux_audio_track_sync(video_path: str) -> str | None:
+    """
+    Copy the first audio track's packets into an audio-only container without
+    decoding, when the codec is one Whisper accepts. Returns the new path, or None
+    when the codec needs a real transcode.
+    """
+    import av
+
+    with av.open(video_path) as in_c:
+        in_stream = next((s for s in in_c.streams if s.type == "audio"), None)
+        if in_stream is None:
+            raise ValueError("No audio track found in this video.")
+        target = _REMUX_TARGETS.get(in_stream.codec_context.name)
+        if target is None:
+            return None
+        container_fmt, ext = target
+        out_path = os.path.join(tempfile.gettempdir(), f"abg_audio_{str(uuid.uuid4())[:10]}.{ext}")
+        try:
+            with av.open(out_path, "w", format=container_fmt) as out_c:
+                if hasattr(out_c, "add_stream_from_template"):
+                    out_stream = out_c.add_stream_from_template(in_stream)
+                else:  # PyAV < 13
+                    out_stream = out_c.add_stream(template=in_stream)
+                for packet in in_c.demux(in_stream):
+                    if packet.dts is None:
+                        continue  # demuxer flush packet
+                    packet.stream = out_stream
+                    out_c.mux(packet)
+        except Exception:
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            raise
+    return out_path
 
 
 def _extract_audio_track_sync(video_path: str) -> str:
     """
-    Decode audio from a video file and re-encode as AAC in an mp4 container.
-    Produces a small audio-only file (~2 MB from a 27 MB combined mp4).
+    Audio-only file for Whisper from a media file. Compatible codecs (AAC, MP3, Opus,
+    Vorbis, FLAC) are stream-copied with no decode at all; anything else falls back to
+    the speech transcode.
+    """
+    try:
+        out_path = _remux_audio_track_sync(video_path)
+        if out_path:
+            print(f"[audio] remuxed audio track without re-encoding: {os.path.getsize(out_path)} bytes")
+            return out_path
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"[audio] remux failed ({e}), transcoding instead")
+    return _transcode_audio_track_sync(video_path)
+
+
+def _transcode_audio_track_sync(video_path: str) -> str:
+    """
+    Decode audio from a media file and re-encode it for speech: 16 kHz mono at a low
+    bitrate (Opus in Ogg, AAC in m4a as fallback) — roughly 0.2 MB per minute whatever
+    the source, versus ~1 MB/min for the old 128 kbps source-rate AAC.
     Uses PyAV (bundled FFmpeg libs — no system ffmpeg binary needed).
     """
     import av  # pip install av
+    from utils.integrations.audio import SAMPLE_RATE, speech_codec, open_speech_stream, log_bytes_saved
+
+    _, container_fmt, ext, _ = speech_codec()
     temp_id     = str(uuid.uuid4())[:10]
-    out_path    = os.path.join(tempfile.gettempdir(), f"abg_audio_{temp_id}.mp4")
+    out_path    = os.path.join(tempfile.gettempdir(), f"abg_audio_{temp_id}.{ext}")
 
     with av.open(video_path) as in_c:
         audio_streams = [s for s in in_c.streams if s.type == "audio"]
         if not audio_streams:
             raise ValueError("No audio track found in this video.")
-        in_stream   = audio_streams[0]
-        in_ctx      = in_stream.codec_context
-        sample_rate = in_ctx.sample_rate or 44100
-        channels    = getattr(in_ctx, "channels", None) or 2
+        in_stream = audio_streams[0]
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
 
-        layout_str = "stereo" if channels >= 2 else "mono"
-        with av.open(out_path, "w", format="mp4") as out_c:
-            out_stream                        = out_c.add_stream("aac", rate=sample_rate)
-            out_stream.codec_context.layout   = layout_str
-            out_stream.codec_context.bit_rate = 128_000
+        with av.open(out_path, "w", format=container_fmt) as out_c:
+            out_stream = open_speech_stream(out_c)
 
-            for frame in in_c.decode(in_stream):
-                frame.pts = None  # let encoder assign PTS
-                for packet in out_stream.encode(frame):
-                    out_c.mux(packet)
+            def _encode(frames):
+                for frame in frames:
+                    frame.pts = None  # let encoder assign PTS
+                    for packet in out_stream.encode(frame):
+                        out_c.mux(packet)
 
+            for frame in in_c.decode(in_stream):
+                _encode(resampler.resample(frame))
+            _encode(resampler.resample(None))
             for packet in out_stream.encode(None):  # flush
                 out_c.mux(packet)
 
+    log_bytes_saved("audio track", os.path.getsize(video_path), os.path.getsize(out_path))
     return out_path
 
 
@@ -374,22 +811,177 @@ async def extract_audio_track(video_path: str) -> str:
     return await loop.run_in_executor(None, _extract_audio_track_sync, video_path)
 
 
-async def transcribe_audio(path: str, openai_client: AsyncOpenAI) -> str:
-    """Send an audio or video file to OpenAI Whisper API, return transcript text."""
+async def transcribe_audio_segments(path: str, openai_client: AsyncOpenAI) -> list[dict]:
+    """
+    Transcribe an audio or video file with Whisper. Returns [{"start", "end", "text"}]
+    with times on the original media's timeline.
+    Audio is decoded once (PyAV): long quiet stretches are trimmed, then long or large
+    media is split at silences and transcribed concurrently (utils/integrations/audio.py),
+    so there is no size ceiling. Short files with nothing to trim are uploaded as-is.
+    """
+    from utils.integrations.audio import (
+        decode_pcm, trim_silence, transcribe_pcm, transcribe_file_segments, SAMPLE_RATE, CHUNK_SECONDS,
+        NORMALIZE_MIN_BYTES,
+    )
+
     file_size = os.path.getsize(path)
+    loop = asyncio.get_event_loop()
+    pcm = None
+    try:
+        # Uploads aren't probed by yt-dlp, so the duration cap is enforced here
+        pcm = await loop.run_in_executor(None, decode_pcm, path, MAX_DURATION_SECONDS)
+    except ValueError:
+        raise  # no audio track, or too long
+    except Exception as e:
+        # PyAV/numpy missing or undecodable — plain single upload below
+        print(f"[whisper] local decode unavailable ({e}), uploading file as-is")
     print(f"[whisper] sending file: {path} ({file_size} bytes)")
+
+    if pcm is not None:
+        speech, offsets = await loop.run_in_executor(None, trim_silence, pcm)
+        if not len(speech):
+            return []
+        if offsets.removed or file_size > min(NORMALIZE_MIN_BYTES, _WHISPER_MAX_BYTES) or len(pcm) > CHUNK_SECONDS * SAMPLE_RATE:
+            return offsets.remap(await transcribe_pcm(speech, openai_client, source_bytes=file_size))
+
     if file_size > _WHISPER_MAX_BYTES:
         raise ValueError(
             f"File is {file_size // (1024 * 1024)} MB — too large for Whisper (max 25 MB). "
             "Try a shorter video."
         )
     with open(path, "rb") as f:
-        response = await openai_client.audio.transcriptions.create(
-            model="whisper-1",
-            file=f,
-            response_format="text",
+        return await transcribe_file_segments(openai_client, f)
+
+
+async def transcribe_audio(path: str, openai_client: AsyncOpenAI) -> str:
+    """Send an audio or video file to OpenAI Whisper API, return transcript text."""
+    from utils.integrations.audio import segments_to_text
+    return segments_to_text(await transcribe_audio_segments(path, openai_client))
+
+
+_SUMMARY_MODEL = "gpt-5.4-mini-2026-03-17"
+_CHUNK_SUMMARY_MODEL = "gpt-5.4-nano-2026-03-17"  # map step: cheap, many calls
+SUMMARY_SINGLE_PASS_TOKENS = 6000   # longer transcripts are summarized map-reduce style
+SUMMARY_CHUNK_TOKENS = 2500
+SUMMARY_MAP_CONCURRENCY = 4
+TRANSCRIPT_CONTEXT_CHARS = 8000     # transcript budget when a reply asks about a TLDR
+_TRANSCRIPT_PASSAGE_CHARS = 1000
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _split_oversized(sentence: str, size, limit: int) -> list[str]:
+    # Unpunctuated speech (auto captions, Whisper on music) can be one huge "sentence":
+    # fall back to words, and slice any single word that is still too big
+    units = []
+    for word in sentence.split():
+        if size(word) > limit:
+            units.extend(word[i:i + limit] for i in range(0, len(word), limit))
+        else:
+            units.append(word)
+    return units
+
+
+def _pack_sentences(text: str, size, limit: int) -> list[str]:
+    # Consecutive sentences packed into pieces whose size(piece) stays within limit
+    units = []
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if size(sentence) > limit:
+            units.extend(_split_oversized(sentence, size, limit))
+        else:
+            units.append(sentence)
+
+    pieces, current, used = [], [], 0
+    for unit in units:
+        n = size(unit) + 1  # + the joining space
+        if current and used + n > limit:
+            pieces.append(" ".join(current))
+            current, used = [], 0
+        current.append(unit)
+        used += n
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_transcript(transcript: str, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> list[str]:
+    """Split a transcript on sentence boundaries into chunks of at most ~max_tokens."""
+    from utils.core.tokens import count_text_tokens
+    return _pack_sentences(transcript, count_text_tokens, max_tokens)
+
+
+class TranscriptIndex:
+    """
+    BM25 over a transcript's passages, so a question about a long video gets the
+    parts that mention it instead of a fixed prefix.
+    """
+
+    def __init__(self, transcript: str):
+        from utils.core.bm25 import BM25Index
+        self.transcript = transcript
+        self.passages = _pack_sentences(transcript, len, _TRANSCRIPT_PASSAGE_CHARS)
+        self.bm25 = BM25Index(self.passages)
+
+    @property
+    def truncated(self) -> bool:
+        return len(self.transcript) > TRANSCRIPT_CONTEXT_CHARS
+
+    def context(self, query: str, budget: int = TRANSCRIPT_CONTEXT_CHARS, include_opening: bool = True) -> str:
+        """
+        The whole transcript when it fits; otherwise (the opening passage plus) the
+        passages most relevant to `query`, in transcript order, within `budget` chars.
+        """
+        if not self.truncated:
+            return self.transcript
+        ranked = self.bm25.search(query, k=len(self.passages))
+        if include_opening:
+            ranked = [0] + [i for i in ranked if i != 0]
+        seen = set(ranked)
+        ranked += [i for i in range(len(self.passages)) if i not in seen]  # then fill in order
+        picked, used = [], 0
+        for i in ranked:
+            if used + len(self.passages[i]) > budget:
+                break
+            picked.append(i)
+            used += len(self.passages[i])
+        if not picked:
+            # Even the best passage is over budget: send its start rather than nothing
+            head = self.passages[ranked[0]][:budget]
+            return head.rsplit(" ", 1)[0] if " " in head else head
+        parts, previous = [], None
+        for i in sorted(picked):
+            if previous is not None and i != previous + 1:
+                parts.append("[…]")
+            parts.append(self.passages[i])
+            previous = i
+        return "\n".join(parts)
+
+
+async def _summarize_chunk(
+    chunk: str,
+    part: int,
+    total: int,
+    title_hint: str,
+    openai_client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+) -> str:
+    messages = [
+        {"role": "system", "content": (
+            "You condense one part of a long video transcript into notes for a later summary. "
+            "Write 4–8 terse bullet points covering the key points, claims, names, numbers "
+            "and memorable quotes in this part. No intro, no conclusion."
+        )},
+        {"role": "user", "content": f"{title_hint}\nPart {part} of {total}:\n{chunk}"},
+    ]
+    async with semaphore:
+        resp = await openai_client.chat.completions.create(
+            model=_CHUNK_SUMMARY_MODEL,
+            messages=messages,
+            max_completion_tokens=400,
         )
-    return (response if isinstance(response, str) else response.text).strip()
+    return (resp.choices[0].message.content or "").strip()
 
 
 async def summarize_transcript(
@@ -426,14 +1018,32 @@ async def summarize_transcript(
 
     if has_frames:
         instruction += (
-            " You are also given frames sampled from the video at even intervals. "
+            " You are also given frames showing the video's distinct scenes, in order. "
             "Use them to add visual context to your summary."
         )
 
     title_hint       = f'Video title: "{metadata.get("title", "Unknown")}"'
-    transcript_body  = transcript[:12000]
-    if len(transcript) > 12000:
-        transcript_body += "\n\n[Transcript truncated — only the first portion was summarized]"
+    transcript_body  = transcript
+
+    from utils.core.tokens import count_text_tokens_async
+    if await count_text_tokens_async(transcript) > SUMMARY_SINGLE_PASS_TOKENS:
+        # Map-reduce: notes per token-budgeted chunk (concurrently, cheap model), then
+        # the normal brief/detailed summary over the notes — covers the whole video.
+        loop = asyncio.get_event_loop()
+        chunks = await loop.run_in_executor(None, chunk_transcript, transcript)
+        semaphore = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+        notes = await asyncio.gather(*(
+            _summarize_chunk(chunk, i + 1, len(chunks), title_hint, openai_client, semaphore)
+            for i, chunk in enumerate(chunks)
+        ))
+        print(f"[tldr] map-reduce summary over {len(chunks)} transcript chunks")
+        transcript_body = "\n\n".join(
+            f"Notes on part {i + 1} of {len(chunks)}:\n{note}" for i, note in enumerate(notes)
+        )
+        instruction += (
+            " The transcript was long, so you are given notes on each consecutive part "
+            "instead of the raw text; summarize the whole video from them."
+        )
 
     if has_frames:
         user_content: list = [
@@ -453,7 +1063,7 @@ async def summarize_transcript(
     ]
 
     resp = await openai_client.chat.completions.create(
-        model="gpt-5.4-mini-2026-03-17",
+        model=_SUMMARY_MODEL,
         messages=messages,
         max_completion_tokens=max_completion_tokens,
     )
@@ -2,8 +2,11 @@ import httpx
 import os
 from dotenv import load_dotenv
 import asyncio
+import re
 from playwright.async_api import async_playwright
 import openai
+from utils.core.ttl_cache import TTLCache
+from utils.core.tokens import truncate_to_tokens
 
 load_dotenv()
 
@@ -16,16 +19,74 @@ if not GOOGLE_API_KEY or not GOOGLE_CSE_ID or not OPENAI_API_KEY:
 
 default_model = "gpt-4.1-mini-2025-04-14"
 
-def truncate_to_token_limit(text, max_tokens, model=default_model):
-    # Truncate text to a token limit
-    import tiktoken
-    enc = tiktoken.get_encoding("cl100k_base")
-    tokens = enc.encode(text)
-    if len(tokens) <= max_tokens:
-        return text
-    return enc.decode(tokens[:max_tokens])
+# Two-level cache shared by every user/channel: normalized query -> CSE result list,
+# and URL -> extracted page text. A trending question asked by several people within
+# a few minutes then costs one CSE call and one Playwright render per page.
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "900"))        # 15 minutes
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "3600"))           # 1 hour
+PAGE_FAILURE_TTL = 300                                              # don't re-render dead pages for 5 minutes
+_search_cache = TTLCache(maxsize=512, ttl=SEARCH_CACHE_TTL)
+_page_cache = TTLCache(maxsize=256, ttl=PAGE_CACHE_TTL)
+_inflight_searches: dict[tuple, asyncio.Future] = {}
+_MISSING = object()  # distinguishes "not cached" from a cached failed extraction (None)
+
+# Filler words that don't change what gets searched ("can you tell me the latest X" ==
+# "latest X"). Tense words stay: "who is the ceo" and "who was the ceo" are different searches.
+_QUERY_FILLER = {"a", "an", "the", "please", "pls", "can", "could", "you", "tell", "me", "about"}
+
+
+def normalize_query(query):
+    # Canonical cache key for a search query: lowercase, punctuation-free, no filler words
+    words = re.sub(r"[^\w\s$€£¥%.+#-]", " ", (query or "").lower()).split()
+    kept = [w.strip(".") for w in words if w.strip(".") and w.strip(".") not in _QUERY_FILLER]
+    return " ".join(kept or words)
+
+
+def get_cache_stats():
+    # Hit/miss counters for both cache levels
+    return {"search": _search_cache.stats(), "pages": _page_cache.stats()}
+
+async def truncate_to_token_limit(text, max_tokens, model=default_model):
+    # Truncate text to a token limit (encoding runs off the event loop)
+    return await truncate_to_tokens(text, max_tokens)
 
 async def google_search(query, num_results=5):
+    # Perform a Google search, served from the shared cache when the same (normalized)
+    # query was searched recently. Concurrent identical searches share one CSE call.
+    key = (normalize_query(query), num_results)
+    cached = _search_cache.get(key)
+    if cached is not None:
+        return cached
+    pending = _inflight_searches.get(key)
+    if pending is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if not pending.cancelled() or (current and current.cancelling()):
+                raise
+            # Only the leader was cancelled (its message was edited): search ourselves
+            return await google_search(query, num_results)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight_searches[key] = future
+    try:
+        results = await _google_search_uncached(query, num_results)
+        _search_cache.set(key, results)
+        future.set_result(results)
+        return results
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved so a waiter-less failure isn't logged as unhandled
+        raise
+    finally:
+        _inflight_searches.pop(key, None)
+
+
+async def _google_search_uncached(query, num_results):
     # Perform a Google search using the Custom Search API
     url = "https://www.googleapis.com/customsearch/v1"
     params = {
@@ -74,11 +135,16 @@ async def extract_main_text_with_playwright(url):
         return content
 
 async def fetch_main_text(url):
-    # Fetch and extract main text from a URL
+    # Fetch and extract main text from a URL, reusing a recent extraction when cached
+    cached = _page_cache.get(url, _MISSING)
+    if cached is not _MISSING:
+        return cached
     try:
-        return await extract_main_text_with_playwright(url)
+        text = await extract_main_text_with_playwright(url)
     except Exception:
-        return None
+        text = None
+    _page_cache.set(url, text, ttl=None if text else PAGE_FAILURE_TTL)
+    return text
 
 async def web_search_and_summarize(query, openai_api_key, num_results=3):
     # Search the web and summarize results
@@ -88,7 +154,8 @@ async def web_search_and_summarize(query, openai_api_key, num_results=3):
     combined_text = "\n\n".join([
         f"Source: {r['title']} ({r['url']})\n{text}" for r, text in zip(results, main_texts) if text
     ])
+    print(f"[websearch] cache stats: {get_cache_stats()}")
     if not combined_text:
         return "No useful information found."
-    combined_text = truncate_to_token_limit(combined_text, max_tokens=250000, model=default_model)
+    combined_text = await truncate_to_token_limit(combined_text, max_tokens=250000, model=default_model)
     return combined_text
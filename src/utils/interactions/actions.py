@@ -42,7 +42,8 @@ _USER_ONLY_MENTIONS = discord.AllowedMentions(users=True, everyone=False, roles=
 # Raw-target patterns we refuse outright (mass-ping / role targets).
 _ROLE_MENTION_RE = re.compile(r"<@&\d+>")
 
-# Appended to the system prompt on every turn (see bot.py) so the PRIMARY completion —
+# Appended to the system prompt whenever the tool gate selects ping_user (see bot.py
+# and utils/ai/tool_gating.py) so the PRIMARY completion —
 # the one that decides whether to call the tool — is willing to. Without this the model
 # tends to refuse ping/spam requests conversationally (moralizing about "harassment")
 # or demand an exact @mention instead of just calling the tool.
@@ -64,7 +65,8 @@ PING_ACTIONS_INSTRUCTION = (
 
 
 def get_interaction_function_schemas():
-    """OpenAI legacy-format function schema(s) for the interactive ping tool.
+    """Bare OpenAI function schema(s) for the interactive ping tool (wrapped into the
+    tools format by message_processing.to_chat_tools / responses_api.to_response_tools).
 
     Kept separate so message_processing.get_function_schemas() can splice it into the
     master tool list. The description is tightly scoped so the model only fires it on
@@ -266,6 +268,28 @@ def _delivery_text(pending):
     return (pending.get("delivery_text") or pending.get("note") or "").strip()
 
 
+async def _resolve_delivery_text(pending):
+    """Wait for the background delivery-text task (started alongside the ack in
+    handle_openai_response) and store its result. Any failure falls back to the raw
+    note, so a flaky delivery completion never blocks the ping itself."""
+    task = pending.pop("delivery_task", None)
+    if task is not None:
+        try:
+            crafted = await task
+            if crafted:
+                pending["delivery_text"] = crafted
+        except Exception as e:
+            print(f"[actions] delivery text generation failed, using raw note: {e}")
+    return _delivery_text(pending)
+
+
+def _discard_delivery_task(pending):
+    """Cancel an unneeded delivery-text task (e.g. the user never confirmed)."""
+    task = pending.pop("delivery_task", None)
+    if task is not None and not task.done():
+        task.cancel()
+
+
 def _reject_target(raw_target):
     """Return True if the raw target is a role / @everyone / @here (must be refused)."""
     lowered = raw_target.lower()
@@ -343,16 +367,19 @@ async def _execute_now(bot, message, guild, pending):
     """Immediate path: resolve target and ping `count` times right now."""
     raw_target = pending["target"]
     if _reject_target(raw_target):
+        _discard_delivery_task(pending)
         await message.reply("nah i'm not pinging a whole role/@everyone 💀")
         return
 
     bot_user_id = bot.user.id if bot.user else None
     target_id = _resolve_target_id(raw_target, guild, message.author.id, bot_user_id)
     if target_id is None:
+        _discard_delivery_task(pending)
         await message.reply("couldn't figure out who you meant — tag them or use their name?")
         return
 
-    await _send_pings(message.channel, target_id, _delivery_text(pending), pending["count"])
+    text = await _resolve_delivery_text(pending)
+    await _send_pings(message.channel, target_id, text, pending["count"])
 
 
 def _parse_ts(value):
@@ -411,18 +438,23 @@ async def _execute_scheduled(bot, channel, guild, pending, requester_id, ack_mes
     restart, then arm the in-memory timer."""
     raw_target = pending["target"]
     if _reject_target(raw_target):
+        _discard_delivery_task(pending)
         await ack_message.reply("can't schedule a ping to a role/@everyone, sorry 🙅")
         return
 
     bot_user_id = bot.user.id if bot.user else None
     target_id = _resolve_target_id(raw_target, guild, requester_id, bot_user_id)
     if target_id is None:
+        _discard_delivery_task(pending)
         await ack_message.reply("couldn't figure out who you meant — tag them or use their name?")
         return
 
     delay = pending["delay_seconds"]
     count = pending["count"]
-    text = _delivery_text(pending)
+    # The delivery text was generated in the background while the ack was sent and the
+    # user confirmed, so this is normally already done. The persisted row stores the
+    # final text, keeping the eventual fire LLM-free and restart-safe.
+    text = await _resolve_delivery_text(pending)
     fire_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=delay)
 
     # Persist first so a restart before firing doesn't lose it. Degrade gracefully to
@@ -487,6 +519,7 @@ async def handle_pending_action(bot, message, ack_message, pending):
     if pending.get("requires_confirmation"):
         confirmed = await await_confirmation(bot, ack_message, requester_id)
         if not confirmed:
+            _discard_delivery_task(pending)
             try:
                 await ack_message.reply("aight, cancelled — you never confirmed 🤷")
             except discord.HTTPException:
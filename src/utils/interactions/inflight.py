@@ -0,0 +1,63 @@
+# In-flight work tracked by the id of the Discord message that triggered it.
+#
+# If the user deletes or edits their message while the bot is still generating a
+# reply (or running a web search / TLDR job for it), the whole task tree is cancelled
+# so no tokens are spent on an answer nobody will read and no stale reply is posted.
+# bot.py wires this to on_raw_message_delete / on_raw_message_edit; edits restart the
+# pipeline with the new content.
+import asyncio
+
+# message id -> (task, content the task was started with, pipeline kind)
+inflight_tasks: dict[int, tuple[asyncio.Task, str, str]] = {}
+
+CANCELLED = object()  # run_cancellable's result when the trigger message changed
+
+
+async def run_cancellable(message, coro, kind="reply"):
+    """Run `coro` as a task tracked under message.id and wait for it.
+
+    `kind` names the pipeline ("reply", "tldr") so an edit can restart the same one.
+    Returns the coroutine's result, or CANCELLED if it was cancelled through
+    cancel_for_message. Cancellation of the caller itself still propagates.
+    """
+    task = asyncio.create_task(coro)
+    inflight_tasks[message.id] = (task, message.content or "", kind)
+    try:
+        return await task
+    except asyncio.CancelledError:
+        current = asyncio.current_task()
+        if task.cancelled() and not (current and current.cancelling()):
+            return CANCELLED  # cancelled on purpose because the trigger message changed
+        raise
+    finally:
+        entry = inflight_tasks.get(message.id)
+        if entry is not None and entry[0] is task:
+            del inflight_tasks[message.id]
+
+
+def inflight_content(message_id) -> str | None:
+    """Content the in-flight task for this message was started with, if any."""
+    entry = inflight_tasks.get(message_id)
+    return entry[1] if entry is not None else None
+
+
+def inflight_kind(message_id) -> str | None:
+    """Which pipeline ("reply", "tldr") is in flight for this message, if any."""
+    entry = inflight_tasks.get(message_id)
+    return entry[2] if entry is not None else None
+
+
+def release_message(message_id) -> None:
+    """Stop tracking a message once its reply has been posted — later edits/deletes
+    must not cancel follow-up work (confirmation waits, history updates)."""
+    inflight_tasks.pop(message_id, None)
+
+
+def cancel_for_message(message_id, reason="") -> bool:
+    """Cancel the in-flight task for a message. Returns True if one was cancelled."""
+    entry = inflight_tasks.pop(message_id, None)
+    if entry is None or entry[0].done():
+        return False
+    print(f"[inflight] cancelling work for message {message_id}{f' ({reason})' if reason else ''}")
+    entry[0].cancel()
+    return True
@@ -0,0 +1,154 @@
+# Admission control for LLM work: token buckets per user, channel and guild.
+#
+# Buckets are sized in estimated tokens, not requests — one message on top of a long
+# persona conversation costs far more than a "lol" in a fresh one. A turn must fit in
+# every bucket that applies to it. If the shortfall refills within RATE_LIMIT_MAX_WAIT
+# seconds the turn just waits its turn; otherwise it gets a canned reply (once per
+# notice window, ⏳ reactions after that) without touching the API. After the reply,
+# the charge is settled against what the turn actually used.
+import os
+import time
+import asyncio
+
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+RATE_LIMIT_NOTICE_WINDOW = 60       # seconds between canned replies to the same user
+OUTPUT_ALLOWANCE = 800              # tokens reserved for the reply until it's known
+IMAGE_TOKENS = 800                  # rough per-image input cost
+
+
+def _limits(scope, burst, per_minute):
+    # (capacity, refill per second) from env, e.g. RATE_LIMIT_USER_BURST / _PER_MIN.
+    # A capacity of 0 disables that scope.
+    capacity = int(os.getenv(f"RATE_LIMIT_{scope}_BURST", str(burst)))
+    refill = int(os.getenv(f"RATE_LIMIT_{scope}_PER_MIN", str(per_minute))) / 60.0
+    return capacity, refill
+
+
+LIMITS = {
+    "user": _limits("USER", 200_000, 100_000),
+    "channel": _limits("CHANNEL", 400_000, 200_000),
+    "guild": _limits("GUILD", 800_000, 400_000),
+}
+MAX_BUCKETS = 5000  # per scope; idle full buckets are pruned past this
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "refill", "tokens", "updated")
+
+    def __init__(self, capacity, refill):
+        self.capacity = capacity
+        self.refill = refill
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refresh(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill)
+        self.updated = now
+
+    def wait_time(self, cost):
+        # Seconds until `cost` tokens are available (0 if they are now)
+        self._refresh()
+        cost = min(cost, self.capacity)  # a turn bigger than the burst still fits when full
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.refill if self.refill > 0 else float("inf")
+
+    def consume(self, cost):
+        self._refresh()
+        self.tokens -= min(cost, self.capacity)
+
+    def credit(self, amount):
+        # Positive refunds an over-estimate, negative charges an under-estimate
+        self._refresh()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def is_idle(self):
+        self._refresh()
+        return self.tokens >= self.capacity
+
+
+_buckets = {scope: {} for scope in LIMITS}  # scope -> id -> TokenBucket
+_last_notice = {}  # user id -> monotonic time of the last canned reply
+
+
+def _bucket(scope, key):
+    capacity, refill = LIMITS[scope]
+    if capacity <= 0 or key is None:
+        return None
+    buckets = _buckets[scope]
+    bucket = buckets.get(key)
+    if bucket is None:
+        if len(buckets) >= MAX_BUCKETS:
+            for idle_key in [k for k, b in buckets.items() if b.is_idle()]:
+                del buckets[idle_key]
+        bucket = buckets[key] = TokenBucket(capacity, refill)
+    return bucket
+
+
+def buckets_for(message):
+    guild_id = message.guild.id if message.guild else None
+    return [
+        b for b in (
+            _bucket("user", message.author.id),
+            _bucket("channel", message.channel.id),
+            _bucket("guild", guild_id),
+        ) if b is not None
+    ]
+
+
+def estimate_turn_tokens(messages):
+    """Rough input + output estimate for a completion over `messages` (~4 chars/token)."""
+    total = OUTPUT_ALLOWANCE
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "image_url":
+                    total += IMAGE_TOKENS
+                elif isinstance(part, dict):
+                    total += len(str(part.get("text", ""))) // 4
+        else:
+            total += len(str(content or "")) // 4
+        total += 4
+    return total
+
+
+async def acquire(message, cost):
+    """Admit a turn costing `cost` estimated tokens.
+
+    Waits (up to RATE_LIMIT_MAX_WAIT) for the buckets to refill, then charges all of
+    them. Returns the list of charged buckets, or None if the turn was rejected.
+    """
+    buckets = buckets_for(message)
+    deadline = time.monotonic() + RATE_LIMIT_MAX_WAIT  # total, across re-checks
+    while True:
+        wait = max((b.wait_time(cost) for b in buckets), default=0.0)
+        if wait <= 0:
+            for b in buckets:
+                b.consume(cost)
+            return buckets
+        if time.monotonic() + wait > deadline:
+            print(f"[ratelimit] rejected {cost} tokens for user {message.author.id} (needs {wait:.0f}s)")
+            return None
+        await asyncio.sleep(wait)  # someone else may drain the bucket meanwhile, so re-check
+
+
+def settle(buckets, estimated, actual):
+    # Replace the up-front estimate with the turn's actual cost
+    for b in buckets or []:
+        b.credit(estimated - actual)
+
+
+async def notify_rejected(message):
+    # Canned reply — no API call. Only once per notice window so spam stays cheap.
+    now = time.monotonic()
+    last = _last_notice.get(message.author.id, 0.0)
+    try:
+        if now - last >= RATE_LIMIT_NOTICE_WINDOW:
+            _last_notice[message.author.id] = now
+            await message.reply("⏳ Slow down a bit, you're sending messages faster than I can keep up. Try again in a minute.")
+        else:
+            await message.add_reaction("⏳")
+    except Exception:
+        pass